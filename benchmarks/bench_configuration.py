@@ -0,0 +1,141 @@
+# -*- coding: utf-8 -*-
+"""
+Benchmarks for configuration time cost at different schema sizes.
+
+Measures the wall time and the peak memory (traced with tracemalloc) of
+
+* constructing sqlalchemy_defaults Columns
+* ``configure_mappers()`` with ``make_lazy_configured`` installed
+* compiling ``CreateTable`` and ``CreateIndex`` statements for SQLite
+* ``MetaData.create_all()`` against an in-memory SQLite database
+
+Usage::
+
+    python -m benchmarks.bench_configuration --models 10 100 1000 \\
+        --columns 5 50 --save benchmarks/baselines/configuration.json
+
+    python -m benchmarks.bench_configuration --models 10 100 1000 \\
+        --columns 5 50 --compare benchmarks/baselines/configuration.json
+"""
+import argparse
+import sys
+
+import sqlalchemy as sa
+from sqlalchemy.schema import CreateIndex, CreateTable
+
+from sqlalchemy_defaults import configure_metadata, make_lazy_configured
+
+from .common import add_baseline_arguments, handle_baseline, measure
+from .schema import generate_columns, generate_models
+
+
+def bench_column_init(model_count, column_count, repeat):
+    def run(_):
+        for _ in range(model_count):
+            generate_columns(column_count)
+
+    return measure(run, repeat=repeat)
+
+
+def bench_configure_mappers(model_count, column_count, repeat):
+    def setup():
+        sa.orm.clear_mappers()
+        Base, models = generate_models(model_count, column_count)
+        for model in models:
+            make_lazy_configured(model.__mapper__)
+        # Mappers are weakly referenced so keep the models alive.
+        return models
+
+    def run(_):
+        sa.orm.configure_mappers()
+
+    try:
+        return measure(run, setup=setup, repeat=repeat)
+    finally:
+        sa.orm.clear_mappers()
+
+
+def configured_metadata(model_count, column_count):
+    sa.orm.clear_mappers()
+    Base, models = generate_models(model_count, column_count)
+    configure_metadata(Base)
+    return Base.metadata
+
+
+def bench_compile_ddl(model_count, column_count, repeat):
+    dialect = sa.create_engine('sqlite://').dialect
+
+    def run(metadata):
+        for table in metadata.sorted_tables:
+            str(CreateTable(table).compile(dialect=dialect))
+            for index in table.indexes:
+                str(CreateIndex(index).compile(dialect=dialect))
+
+    try:
+        return measure(
+            run,
+            setup=lambda: configured_metadata(model_count, column_count),
+            repeat=repeat
+        )
+    finally:
+        sa.orm.clear_mappers()
+
+
+def bench_create_all(model_count, column_count, repeat):
+    def run(metadata):
+        engine = sa.create_engine('sqlite://')
+        metadata.create_all(engine)
+        engine.dispose()
+
+    try:
+        return measure(
+            run,
+            setup=lambda: configured_metadata(model_count, column_count),
+            repeat=repeat
+        )
+    finally:
+        sa.orm.clear_mappers()
+
+
+BENCHMARKS = (
+    ('column_init', bench_column_init),
+    ('configure_mappers', bench_configure_mappers),
+    ('compile_ddl', bench_compile_ddl),
+    ('create_all', bench_create_all),
+)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument(
+        '--models', type=int, nargs='+', default=[10, 100, 1000]
+    )
+    parser.add_argument('--columns', type=int, nargs='+', default=[5, 50])
+    parser.add_argument(
+        '--only',
+        choices=[name for name, _ in BENCHMARKS],
+        nargs='+',
+        help='run only given benchmarks'
+    )
+    add_baseline_arguments(parser)
+    args = parser.parse_args(argv)
+
+    results = {}
+    for name, benchmark in BENCHMARKS:
+        if args.only and name not in args.only:
+            continue
+        for model_count in args.models:
+            for column_count in args.columns:
+                key = '%s[models=%d,columns=%d]' % (
+                    name, model_count, column_count
+                )
+                result = benchmark(model_count, column_count, args.repeat)
+                results[key] = result
+                print('%-60s %10.4fs %10.1f KiB' % (
+                    key, result['seconds'], result['peak_memory'] / 1024.
+                ))
+    return handle_baseline(args, results, 'seconds')
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,239 @@
+# -*- coding: utf-8 -*-
+"""
+Write path benchmarks comparing the cost of generated server defaults, check
+constraints, foreign key indexes and Python side defaults.
+
+Each scenario is run once with the DEFAULT_OPTIONS, once with each option
+toggled against its default in turn (``<option>_off`` for options enabled by
+default, ``<option>_on`` for the others), once with all options enabled and
+once with all options disabled:
+
+* ``executemany`` - Core bulk inserts of plain dicts
+* ``orm_insert`` - ORM inserts flushed in batches
+* ``orm_update`` - ORM updates of loaded objects flushed in batches
+
+Rows per second and per batch latency percentiles are reported.
+
+Usage::
+
+    python -m benchmarks.bench_writes --rows 20000 --batch-size 500 \\
+        --save benchmarks/baselines/writes.json
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+import sqlalchemy as sa
+from sqlalchemy.orm import declarative_base, Session
+
+from sqlalchemy_defaults import (
+    Column,
+    ConfigurationManager,
+    configure_metadata
+)
+
+from .common import add_baseline_arguments, handle_baseline
+
+
+def build_models(options):
+    Base = declarative_base()
+
+    class Account(Base):
+        __tablename__ = 'account'
+        __lazy_options__ = dict(options)
+
+        id = Column(sa.Integer, primary_key=True)
+        name = Column(sa.Unicode(255), default=u'account')
+
+    class Event(Base):
+        __tablename__ = 'event'
+        __lazy_options__ = dict(options)
+
+        id = Column(sa.Integer, primary_key=True)
+        account_id = Column(sa.Integer, sa.ForeignKey(Account.id))
+        # Mostly NULL, for partial_foreign_key_indexes
+        referrer_id = Column(
+            sa.Integer,
+            sa.ForeignKey(Account.id),
+            nullable=True
+        )
+        kind = Column(sa.Unicode(50), default=u'click')
+        status = Column(
+            sa.Unicode(20),
+            choices=[u'new', u'processed', u'failed'],
+            default=u'new'
+        )
+        priority = Column(sa.Integer, default=1, min=0, max=10)
+        amount = Column(sa.Numeric(10, 2), default=0, min=0)
+        # Nullable so that inserts succeed with boolean_defaults disabled
+        is_processed = Column(sa.Boolean, nullable=True)
+        created_at = Column(sa.DateTime, auto_now=True)
+
+    configure_metadata(Base)
+    return Base, Account, Event
+
+
+def option_sets():
+    defaults = ConfigurationManager.DEFAULT_OPTIONS
+    yield 'defaults', dict(defaults)
+    for name in sorted(defaults):
+        options = dict(defaults)
+        options[name] = not defaults[name]
+        yield '%s_%s' % (name, 'on' if options[name] else 'off'), options
+    yield 'all_on', dict((name, True) for name in defaults)
+    yield 'all_off', dict((name, False) for name in defaults)
+
+
+def percentile(values, fraction):
+    values = sorted(values)
+    index = min(len(values) - 1, int(round(fraction * (len(values) - 1))))
+    return values[index]
+
+
+def summarize(latencies, rows):
+    total = sum(latencies)
+    return {
+        'rows_per_second': rows / total if total else float('inf'),
+        'p50_ms': percentile(latencies, 0.5) * 1000,
+        'p95_ms': percentile(latencies, 0.95) * 1000,
+        'p99_ms': percentile(latencies, 0.99) * 1000,
+        'seconds': total,
+    }
+
+
+def batches(row_count, batch_size):
+    for start in range(0, row_count, batch_size):
+        yield range(start, min(start + batch_size, row_count))
+
+
+def timed_batches(func, row_count, batch_size):
+    latencies = []
+    for batch in batches(row_count, batch_size):
+        start = time.perf_counter()
+        func(batch)
+        latencies.append(time.perf_counter() - start)
+    return summarize(latencies, row_count)
+
+
+def bench_executemany(engine, Account, Event, row_count, batch_size):
+    table = Event.__table__
+
+    with engine.begin() as connection:
+        def insert(batch):
+            connection.execute(
+                table.insert(),
+                [
+                    {'account_id': 1 + index % 10, 'priority': index % 10}
+                    for index in batch
+                ]
+            )
+        return timed_batches(insert, row_count, batch_size)
+
+
+def bench_orm_insert(engine, Account, Event, row_count, batch_size):
+    with Session(engine) as session:
+        def insert(batch):
+            session.add_all([
+                Event(account_id=1 + index % 10, priority=index % 10)
+                for index in batch
+            ])
+            session.flush()
+        result = timed_batches(insert, row_count, batch_size)
+        session.commit()
+    return result
+
+
+def bench_orm_update(engine, Account, Event, row_count, batch_size):
+    with engine.begin() as connection:
+        connection.execute(
+            Event.__table__.insert(),
+            [{'account_id': 1, 'priority': 1} for _ in range(row_count)]
+        )
+    with Session(engine) as session:
+        events = session.query(Event).order_by(Event.id).all()
+
+        def update(batch):
+            for index in batch:
+                events[index].priority = index % 10
+            session.flush()
+        result = timed_batches(update, row_count, batch_size)
+        session.commit()
+    return result
+
+
+SCENARIOS = (
+    ('executemany', bench_executemany),
+    ('orm_insert', bench_orm_insert),
+    ('orm_update', bench_orm_update),
+)
+
+
+def run_scenario(scenario, options, args):
+    Base, Account, Event = build_models(options)
+    handle, path = tempfile.mkstemp(suffix='.db')
+    os.close(handle)
+    engine = sa.create_engine(args.dsn or 'sqlite:///%s' % path)
+    try:
+        Base.metadata.create_all(engine)
+        with engine.begin() as connection:
+            connection.execute(
+                Account.__table__.insert(),
+                [{'name': u'account %d' % index} for index in range(10)]
+            )
+        return scenario(
+            engine, Account, Event, args.rows, args.batch_size
+        )
+    finally:
+        Base.metadata.drop_all(engine)
+        engine.dispose()
+        os.remove(path)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('--rows', type=int, default=20000)
+    parser.add_argument('--batch-size', type=int, default=500)
+    parser.add_argument(
+        '--dsn',
+        help='database to run against (default: temporary SQLite file)'
+    )
+    parser.add_argument(
+        '--only',
+        choices=[name for name, _ in SCENARIOS],
+        nargs='+',
+        help='run only given scenarios'
+    )
+    add_baseline_arguments(parser)
+    args = parser.parse_args(argv)
+
+    results = {}
+    for scenario_name, scenario in SCENARIOS:
+        if args.only and scenario_name not in args.only:
+            continue
+        for options_name, options in option_sets():
+            key = '%s[%s]' % (scenario_name, options_name)
+            result = max(
+                (
+                    run_scenario(scenario, options, args)
+                    for _ in range(args.repeat)
+                ),
+                key=lambda result: result['rows_per_second']
+            )
+            results[key] = result
+            print(
+                '%-50s %10.0f rows/s  p50 %7.2fms  p95 %7.2fms  '
+                'p99 %7.2fms' % (
+                    key,
+                    result['rows_per_second'],
+                    result['p50_ms'],
+                    result['p95_ms'],
+                    result['p99_ms'],
+                )
+            )
+    return handle_baseline(args, results, 'seconds')
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,125 @@
+# -*- coding: utf-8 -*-
+"""
+Timing, memory measurement and baseline helpers shared by benchmarks.
+"""
+import gc
+import json
+import os
+import platform
+import time
+import tracemalloc
+
+import sqlalchemy as sa
+
+import sqlalchemy_defaults
+
+
+def measure(func, setup=None, repeat=3):
+    """
+    Run ``func`` ``repeat`` times and return a dict with the best wall time in
+    seconds and the peak memory in bytes allocated during a separate traced
+    run (tracing slows down execution so it is not timed).
+
+    :param func: callable receiving the return value of ``setup``
+    :param setup: optional callable run before each repetition, not timed
+    """
+    best = None
+    for _ in range(repeat):
+        argument = setup() if setup is not None else None
+        gc.collect()
+        start = time.perf_counter()
+        func(argument)
+        elapsed = time.perf_counter() - start
+        if best is None or elapsed < best:
+            best = elapsed
+        del argument
+
+    argument = setup() if setup is not None else None
+    gc.collect()
+    tracemalloc.start()
+    try:
+        func(argument)
+        peak = tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+    return {'seconds': best, 'peak_memory': peak}
+
+
+def environment():
+    return {
+        'python': platform.python_version(),
+        'sqlalchemy': sa.__version__,
+        'sqlalchemy_defaults': sqlalchemy_defaults.__version__,
+        'platform': platform.platform(),
+    }
+
+
+def save_baseline(path, results):
+    directory = os.path.dirname(path)
+    if directory and not os.path.isdir(directory):
+        os.makedirs(directory)
+    with open(path, 'w') as f:
+        json.dump(
+            {'environment': environment(), 'results': results},
+            f,
+            indent=2,
+            sort_keys=True
+        )
+
+
+def compare_baseline(path, results, metric, tolerance):
+    """
+    Compare results to the baseline stored in given path. Print a line for
+    each compared benchmark and return a list of regressions, ie. benchmarks
+    whose ``metric`` grew more than ``tolerance`` (a fraction) compared to
+    the baseline.
+    """
+    with open(path) as f:
+        baseline = json.load(f)['results']
+    regressions = []
+    for name, result in sorted(results.items()):
+        if name not in baseline:
+            continue
+        before = baseline[name][metric]
+        after = result[metric]
+        ratio = after / before if before else float('inf')
+        status = 'REGRESSION' if ratio > 1 + tolerance else 'ok'
+        print('%-60s %10.4g -> %10.4g (%5.2fx) %s' % (
+            name, before, after, ratio, status
+        ))
+        if status != 'ok':
+            regressions.append(name)
+    return regressions
+
+
+def add_baseline_arguments(parser):
+    parser.add_argument(
+        '--save',
+        metavar='PATH',
+        help='store results as a JSON baseline in given path'
+    )
+    parser.add_argument(
+        '--compare',
+        metavar='PATH',
+        help='compare results to a JSON baseline stored in given path'
+    )
+    parser.add_argument(
+        '--tolerance',
+        type=float,
+        default=0.2,
+        help='allowed slowdown as a fraction of the baseline (default 0.2)'
+    )
+    parser.add_argument('--repeat', type=int, default=3)
+
+
+def handle_baseline(args, results, metric):
+    """
+    Save and/or compare results according to command line arguments and
+    return process exit code.
+    """
+    if args.save:
+        save_baseline(args.save, results)
+    if args.compare:
+        if compare_baseline(args.compare, results, metric, args.tolerance):
+            return 1
+    return 0
@@ -0,0 +1,95 @@
+# -*- coding: utf-8 -*-
+"""
+Synthetic schema generation for benchmarks.
+"""
+import itertools
+
+import sqlalchemy as sa
+from sqlalchemy.orm import declarative_base
+
+from sqlalchemy_defaults import Column
+
+
+def integer_column(name, index):
+    return Column(name, sa.Integer, default=index, min=0, max=10000)
+
+
+def string_column(name, index):
+    return Column(name, sa.Unicode(255), default=u'value %d' % index)
+
+
+def boolean_column(name, index):
+    return Column(name, sa.Boolean)
+
+
+def numeric_column(name, index):
+    return Column(name, sa.Numeric(10, 2), default=index, min=0)
+
+
+def datetime_column(name, index):
+    return Column(name, sa.DateTime, auto_now=True)
+
+
+def date_column(name, index):
+    return Column(name, sa.Date)
+
+
+def enum_column(name, index):
+    return Column(name, sa.Enum('draft', 'published', 'archived'))
+
+
+def text_column(name, index):
+    return Column(name, sa.UnicodeText, nullable=True)
+
+
+#: Column factories used in round robin order when generating columns.
+COLUMN_FACTORIES = (
+    integer_column,
+    string_column,
+    boolean_column,
+    numeric_column,
+    datetime_column,
+    date_column,
+    enum_column,
+    text_column,
+)
+
+
+def generate_columns(column_count):
+    """
+    Return a list of ``column_count`` sqlalchemy_defaults Columns of mixed
+    types.
+    """
+    factories = itertools.cycle(COLUMN_FACTORIES)
+    return [
+        next(factories)('col_%d' % index, index)
+        for index in range(column_count)
+    ]
+
+
+def generate_models(model_count, column_count, lazy_options=None):
+    """
+    Generate a declarative base with ``model_count`` models, each having an
+    integer primary key, a foreign key to the previous model and
+    ``column_count`` columns of mixed types.
+
+    :return: (Base, models) tuple
+    """
+    Base = declarative_base()
+    models = []
+    for index in range(model_count):
+        attrs = {
+            '__tablename__': 'model_%d' % index,
+            '__lazy_options__': dict(lazy_options or {}),
+            'id': Column(sa.Integer, primary_key=True),
+        }
+        if models:
+            attrs['parent_id'] = Column(
+                sa.Integer,
+                sa.ForeignKey('model_%d.id' % (index - 1)),
+                nullable=True
+            )
+        for column in generate_columns(column_count):
+            attrs[column.name] = column
+        models.append(type('Model%d' % index, (Base, ), attrs))
+    return Base, models
@@ -24,6 +24,7 @@ def get_version():
 
 
 extras_require = {
+    'columnar': ['numpy'],
     'test': [
         'pytest>=2.9.1',
         'Pygments>=1.2',
@@ -53,7 +54,7 @@ setup(
     platforms='any',
     install_requires=[
         'six',
-        'SQLAlchemy>=0.7.8',
+        'SQLAlchemy>=1.4',
     ],
     extras_require=extras_require,
     classifiers=[
@@ -63,12 +64,12 @@ setup(
         'Operating System :: OS Independent',
         'Programming Language :: Python',
         'Programming Language :: Python :: 2',
-        'Programming Language :: Python :: 2.6',
         'Programming Language :: Python :: 2.7',
         'Programming Language :: Python :: 3',
-        'Programming Language :: Python :: 3.3',
-        'Programming Language :: Python :: 3.4',
-        'Programming Language :: Python :: 3.5',
+        'Programming Language :: Python :: 3.6',
+        'Programming Language :: Python :: 3.7',
+        'Programming Language :: Python :: 3.8',
+        'Programming Language :: Python :: 3.9',
         'Topic :: Internet :: WWW/HTTP :: Dynamic Content',
         'Topic :: Software Development :: Libraries :: Python Modules'
     ]
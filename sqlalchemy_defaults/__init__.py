@@ -1,34 +1,91 @@
-from datetime import date, datetime
+import threading
+import weakref
+from datetime import date, datetime, time
+from decimal import Decimal
 from inspect import isclass
 
 import six
 import sqlalchemy as sa
+from sqlalchemy.sql.expression import UpdateBase
 
 __version__ = '0.4.4'
 
+CHECK_CONSTRAINT_MODES = (False, True, 'between', 'table')
+
+#: Info key used for tagging generated indexes and constraints
+GENERATED_BY = 'sqlalchemy_defaults.generated_by'
+
+AUTO_NOW_MODES = (True, 'batch', 'server')
+
+#: SQL expressions used as server defaults, referenced by name in operations
+SQL_SERVER_DEFAULTS = {
+    'now': sa.func.now,
+    'true': sa.sql.expression.true,
+    'false': sa.sql.expression.false,
+}
+
+_batch_timestamps = weakref.WeakKeyDictionary()
+_bool_or_str_types = weakref.WeakKeyDictionary()
+_configured_tables = weakref.WeakSet()
+_enum_registries = weakref.WeakKeyDictionary()
+_configure_lock = threading.RLock()
+_deferred_tables = weakref.WeakKeyDictionary()
+_table_plans = weakref.WeakKeyDictionary()
+_deferred_metadata = weakref.WeakSet()
+_execute_hook_installed = []
+
 
 class Column(sa.Column):
-    def __init__(self, *args, **kwargs):
-        kwargs.setdefault('info', {})
+    #: Keyword arguments which are stored in column info. Only the arguments
+    #: actually given are stored.
+    INFO_ARGUMENTS = (
+        'choices',
+        'label',
+        'description',
+        'validators',
+        'value_validators',
+        'min',
+        'max',
+        'auto_now'
+    )
 
-        kwargs['info'].setdefault('choices', kwargs.pop('choices', None))
-        kwargs['info'].setdefault('label', kwargs.pop('label', ''))
-        kwargs['info'].setdefault('description', kwargs.pop('description', ''))
-        kwargs['info'].setdefault('validators', kwargs.pop('validators', []))
-        kwargs['info'].setdefault('min', kwargs.pop('min', None))
-        kwargs['info'].setdefault('max', kwargs.pop('max', None))
-        kwargs['info'].setdefault('auto_now', kwargs.pop('auto_now', False))
+    inherit_cache = True
+
+    def __init__(self, *args, **kwargs):
+        info = kwargs.get('info')
+        for key in self.INFO_ARGUMENTS:
+            if key in kwargs:
+                if info is None:
+                    info = kwargs['info'] = {}
+                info.setdefault(key, kwargs.pop(key))
 
         # Make strings and booleans not nullable by default
-        if args:
+        if args and 'nullable' not in kwargs:
             if (
                 any(bool_or_str(arg) for arg in args[0:2]) or
                 ('type' in kwargs and bool_or_str(kwargs['type']))
             ):
-                kwargs.setdefault('nullable', False)
+                kwargs['nullable'] = False
 
         sa.Column.__init__(self, *args, **kwargs)
 
+    @classmethod
+    def _from_normalized(cls, *args, **kwargs):
+        """
+        Create a column from already normalized arguments, skipping the info
+        argument extraction and nullable classification of ``__init__``.
+        """
+        column = cls.__new__(cls)
+        sa.Column.__init__(column, *args, **kwargs)
+        return column
+
+    @property
+    def _constructor(self):
+        # Copies (eg. of mixin columns) and proxies are created from the
+        # arguments of an existing column: info is already populated and
+        # nullable is passed explicitly whenever it was given or classified.
+        return self._from_normalized
+
     @property
     def choices(self):
         return self.info['choices'] if 'choices' in self.info else []
@@ -42,6 +99,155 @@ class Column(sa.Column):
         return self.info['description'] if 'description' in self.info else ''
 
 
+class Options(object):
+    """
+    Immutable mapping of resolved configuration options.
+    """
+    __slots__ = ('_values',)
+
+    def __init__(self, values):
+        object.__setattr__(self, '_values', dict(values))
+
+    def __getitem__(self, name):
+        return self._values[name]
+
+    def __setattr__(self, name, value):
+        raise AttributeError('Options are immutable.')
+
+    def __eq__(self, other):
+        return isinstance(other, Options) and self._values == other._values
+
+    def __ne__(self, other):
+        return not self == other
+
+    def __repr__(self):
+        return 'Options(%r)' % self._values
+
+    def merge(self, overrides):
+        """
+        Return new Options with given overrides applied.
+
+        :param overrides: dict of option overrides
+        :raises ValueError: if overrides contain unknown options
+        """
+        if not overrides:
+            return self
+        unknown = set(overrides) - set(self._values)
+        if unknown:
+            raise ValueError(
+                'Unknown lazy option(s): %s' % ', '.join(sorted(unknown))
+            )
+        values = dict(self._values)
+        values.update(overrides)
+        return Options(values)
+
+
+class ChoiceCode(sa.types.TypeDecorator):
+    """
+    Stores choice values as small integer codes. The code of each choice is
+    its position in the given choices, so new choices may only be appended.
+
+    :param choices:
+        list of choice values or (value, label) tuples
+    """
+    impl = sa.SmallInteger
+    cache_ok = True
+
+    def __init__(self, choices):
+        self.choices = tuple(choice_values(choices))
+        self.codes = dict(
+            (value, code) for code, value in enumerate(self.choices)
+        )
+        sa.types.TypeDecorator.__init__(self)
+
+    def process_bind_param(self, value, dialect):
+        if value is None:
+            return None
+        try:
+            return self.codes[value]
+        except KeyError:
+            raise ValueError('%r is not a valid choice' % (value, ))
+
+    def process_literal_param(self, value, dialect):
+        return self.process_bind_param(value, dialect)
+
+    def process_result_value(self, value, dialect):
+        if value is None:
+            return None
+        return self.choices[value]
+
+    @property
+    def python_type(self):
+        return self.choices[0].__class__ if self.choices else str
+
+
+class EnumRegistry(object):
+    """
+    Canonical enum type names of a MetaData keyed by the enum values. Value
+    order is significant, since it defines the ordering of native enums.
+    """
+    def __init__(self):
+        self.names = {}
+        self.values = {}
+
+    def register(self, enums, name):
+        """
+        Register given name for given enum values. The first name registered
+        for a sequence of values becomes its canonical name.
+        """
+        values = tuple(enums)
+        self.names.setdefault(values, name)
+        self.values.setdefault(name, values)
+
+    def name_for(self, enums, column_name, table_name):
+        """
+        Return the canonical name for given enum values, registering a new
+        name if the values haven't been seen before. New names are
+        ``<column>_enum``, ``<table>_<column>_enum`` if the former is taken by
+        other values, or the latter with a numeric suffix.
+        """
+        values = tuple(enums)
+        try:
+            return self.names[values]
+        except KeyError:
+            pass
+        candidates = [
+            '%s_enum' % column_name,
+            '%s_%s_enum' % (table_name, column_name)
+        ]
+        for name in candidates:
+            if name not in self.values:
+                break
+        else:
+            suffix = 2
+            while '%s_%d' % (candidates[-1], suffix) in self.values:
+                suffix += 1
+            name = '%s_%d' % (candidates[-1], suffix)
+        self.register(values, name)
+        return name
+
+
+def get_enum_registry(metadata):
+    """
+    Return the EnumRegistry of given MetaData. Explicitly named enums of the
+    MetaData are registered when the registry is created.
+    """
+    try:
+        return _enum_registries[metadata]
+    except KeyError:
+        pass
+    with _configure_lock:
+        registry = _enum_registries.get(metadata)
+        if registry is None:
+            registry = _enum_registries[metadata] = EnumRegistry()
+            for table in metadata.tables.values():
+                for column in table.columns:
+                    type_ = resolve_type(column.type)
+                    if isinstance(type_, sa.Enum) and type_.name:
+                        registry.register(type_.enums, type_.name)
+        return registry
+
+
 class ConfigurationManager(object):
     DEFAULT_OPTIONS = {
         'auto_now': True,
@@ -50,65 +256,367 @@ class ConfigurationManager(object):
         'boolean_defaults': True,
         'min_max_check_constraints': True,
         'enum_names': True,
-        'index_foreign_keys': True
+        'index_foreign_keys': True,
+        'partial_foreign_key_indexes': False,
+        'compact_choices': False
     }
 
+    #: Type specific default assigners as (types, option, method name) tuples
+    #: in the order of precedence.
+    TYPE_DEFAULTS = (
+        (sa.Boolean, 'boolean_defaults', 'assign_boolean_defaults'),
+        (sa.String, 'string_defaults', 'assign_string_defaults'),
+        (
+            (sa.Integer, sa.Float, sa.Numeric),
+            'numeric_defaults',
+            'assign_numeric_defaults'
+        ),
+        ((sa.Date, sa.DateTime), 'auto_now', 'assign_datetime_auto_now'),
+    )
+
+    def __init__(self):
+        #: Callables called with each ModelConfigurator after it has
+        #: configured its table
+        self.listeners = []
+        #: Optional :class:`~sqlalchemy_defaults.stats.ConfigurationStats`
+        #: collector measuring each configured table
+        self.stats = None
+        self.type_handlers = {}
+        self.default_options = Options(self.DEFAULT_OPTIONS)
+        self.metadata_options = weakref.WeakKeyDictionary()
+
+    def get_metadata_options(self, metadata):
+        """
+        Return options for given MetaData. Options can be overridden per
+        MetaData using the ``lazy_options`` key of ``MetaData.info``.
+        """
+        try:
+            return self.metadata_options[metadata]
+        except KeyError:
+            options = self.metadata_options[metadata] = (
+                self.default_options.merge(
+                    metadata.info.get('lazy_options')
+                )
+            )
+            return options
+
+    def get_type_handlers(self, type_):
+        """
+        Return a list of (option, method name) tuples applicable for given
+        column type. The list is resolved once per type class using the
+        class MRO and cached for all later columns of the same type class.
+
+        TypeDecorators are resolved through their ``impl``.
+        """
+        type_cls = resolve_type(type_).__class__
+        try:
+            return self.type_handlers[type_cls]
+        except KeyError:
+            handlers = self.type_handlers[type_cls] = [
+                (option, method)
+                for types, option, method in self.TYPE_DEFAULTS
+                if issubclass(type_cls, types)
+            ]
+            return handlers
+
+    def configure_table(self, table, model=None):
+        """
+        Configure given table. Each table is configured only once, even if it
+        is mapped by several classes (eg. single table inheritance) or
+        configuration is re-entered or run from several threads.
+
+        :param table: Table to configure
+        :param model: Optional model class mapped to given table
+        :return: True if the table was configured, False if it had already
+            been configured
+        """
+        def configure():
+            configurator = ModelConfigurator(self, model, table=table)
+            if self.stats is None:
+                configurator()
+            else:
+                self.stats.measure(configurator)
+            _table_plans[table] = configurator.plan
+            for listener in self.listeners:
+                listener(configurator)
+
+        return configure_once(table, configure)
+
+    def replay_table(self, table, plan, operations=None):
+        """
+        Apply a previously recorded configuration plan (see
+        ``ModelConfigurator.plan``) to given table instead of configuring it.
+        Like :meth:`configure_table` this is done only once per table.
+
+        :param table: Table to apply the plan to
+        :param plan: list of (option, operation, args) tuples
+        :param operations:
+            Optional collection of operation names to apply. Other operations
+            of the plan are only recorded, eg. for copies of configured tables
+            which already carry their results.
+        :return: True if the plan was applied, False if the table had already
+            been configured
+        """
+        def replay():
+            for option, operation, args in plan:
+                if operations is None or operation in operations:
+                    apply_operation(table, operation, args)
+            _table_plans[table] = plan
+
+        return configure_once(table, replay)
+
     def __call__(self, mapper, class_):
         if hasattr(class_, '__lazy_options__'):
-            configurator = ModelConfigurator(self, class_)
-            configurator()
+            self.configure_table(class_.__table__, class_)
 
 
 class ModelConfigurator(object):
-    def __init__(self, manager, model):
+    def __init__(self, manager, model, table=None):
         self.manager = manager
         self.model = model
-        self.table = self.model.__table__
+        self.table = self.model.__table__ if table is None else table
+        self.options = manager.get_metadata_options(
+            self.table.metadata
+        ).merge(
+            self.table.info.get('lazy_options')
+        ).merge(
+            getattr(model, '__lazy_options__', None)
+        )
+        self.column_options = dict(
+            (column.key, self.options.merge(column.info['lazy_options']))
+            for column in self.table.columns
+            if column.info.get('lazy_options')
+        )
+        #: List of (option, operation, args) tuples applied to the table
+        self.plan = []
 
-    def get_option(self, name):
-        try:
-            return self.model.__lazy_options__[name]
-        except (AttributeError, KeyError):
-            return self.manager.DEFAULT_OPTIONS[name]
+    def get_column_options(self, column):
+        """
+        Return options for given column. Options can be overridden per
+        column using the ``lazy_options`` key of column info.
+        """
+        return self.column_options.get(column.key, self.options)
+
+    def get_option(self, name, column=None):
+        if column is None:
+            return self.options[name]
+        return self.get_column_options(column)[name]
+
+    def apply(self, option, operation, *args):
+        """
+        Apply given operation to the table and record it in the plan of this
+        configurator.
+
+        :param option: name of the option the operation is generated by
+        :param operation: name of the operation in :data:`OPERATIONS`
+        :param args: JSON serializable arguments of the operation
+        """
+        self.plan.append((option, operation, args))
+        apply_operation(self.table, operation, args)
 
     def literal_value(self, value):
-        return (
-            value.isoformat()
-            if isinstance(value, (date, datetime))
-            else value
-        )
+        """
+        Return given min or max value in a JSON serializable form: dates and
+        times as ISO 8601 strings and decimals as strings (see
+        :func:`check_condition`).
+        """
+        if isinstance(value, (date, datetime, time)):
+            return value.isoformat()
+        if isinstance(value, Decimal):
+            return six.text_type(value)
+        return value
+
+    def check_constraint_name(self, name):
+        """
+        Return deterministic name for a generated check constraint. If the
+        MetaData has a naming convention for check constraints given name is
+        used as its ``constraint_name`` token.
+        """
+        if 'ck' in self.table.metadata.naming_convention:
+            return name
+        return 'ck_%s_%s' % (self.table.name, name)
+
+    def min_max_checks(self, column, between=False):
+        """
+        Return check condition specifications based on min and max column
+        info arguments. See :func:`check_condition` for the format.
+
+        :param between:
+            Whether or not to combine min and max into a single BETWEEN
+            condition when both are given
+        """
+        min_ = column.info.get('min')
+        max_ = column.info.get('max')
+        if between and min_ is not None and max_ is not None:
+            return [(
+                column.key,
+                'between',
+                self.literal_value(min_),
+                self.literal_value(max_)
+            )]
+        checks = []
+        if min_ is not None:
+            checks.append((column.key, '>=', self.literal_value(min_)))
+        if max_ is not None:
+            checks.append((column.key, '<=', self.literal_value(max_)))
+        return checks
 
-    def append_check_constraints(self, column):
+    def append_check_constraints(self, column, mode=True):
         """
         Generate check constraints based on min and max column info arguments
+
+        :param mode:
+            True for separate anonymous min and max constraints or
+            ``'between'`` for a single named constraint
         """
-        if 'min' in column.info and column.info['min'] is not None:
-            constraint = sa.schema.CheckConstraint(
-                column >= self.literal_value(column.info['min'])
+        if mode == 'between':
+            checks = self.min_max_checks(column, between=True)
+            if checks:
+                self.apply(
+                    'min_max_check_constraints',
+                    'check',
+                    self.check_constraint_name('%s_min_max' % column.name),
+                    checks
+                )
+        else:
+            for check in self.min_max_checks(column):
+                self.apply('min_max_check_constraints', 'check', None, [check])
+
+    def append_table_check_constraint(self, checks):
+        """
+        Generate a single named table level check constraint from given
+        check condition specifications.
+        """
+        if checks:
+            self.apply(
+                'min_max_check_constraints',
+                'check',
+                self.check_constraint_name('min_max'),
+                checks
             )
-            self.table.append_constraint(constraint)
-        if 'max' in column.info and column.info['max'] is not None:
-            constraint = sa.schema.CheckConstraint(
-                column <= self.literal_value(column.info['max'])
+
+    def indexed_column_prefixes(self):
+        """
+        Return a list of column key tuples of the primary key, unique
+        constraints and indexes of the table. Only the leading plain columns
+        of each index are included.
+        """
+        prefixes = [
+            tuple(column.key for column in self.table.primary_key.columns)
+        ]
+        for constraint in self.table.constraints:
+            if isinstance(constraint, sa.UniqueConstraint):
+                prefixes.append(
+                    tuple(column.key for column in constraint.columns)
+                )
+        for index in self.table.indexes:
+            prefix = []
+            for expression in getattr(index, 'expressions', index.columns):
+                if not isinstance(expression, sa.Column):
+                    break
+                prefix.append(expression.key)
+            prefixes.append(tuple(prefix))
+        return [prefix for prefix in prefixes if prefix]
+
+    def plan_foreign_key_indexes(self):
+        """
+        Return a list of column tuples that need an index because of their
+        foreign key constraints. Foreign keys whose columns already lead the
+        primary key, a unique constraint or an index are skipped. Multi column
+        foreign keys get a single composite index.
+        """
+        positions = dict(
+            (column.key, position)
+            for position, column in enumerate(self.table.columns)
+        )
+        constraints = sorted(
+            self.table.foreign_key_constraints,
+            key=lambda constraint: [
+                positions[column.key] for column in constraint.columns
+            ]
+        )
+        prefixes = self.indexed_column_prefixes()
+        plan = []
+        for constraint in constraints:
+            columns = tuple(constraint.columns)
+            if not columns or not all(
+                self.get_column_options(column)['index_foreign_keys']
+                for column in columns
+            ):
+                continue
+            keys = set(column.key for column in columns)
+            if any(
+                set(prefix[:len(keys)]) == keys for prefix in prefixes
+            ):
+                continue
+            plan.append(columns)
+            prefixes.append(tuple(column.key for column in columns))
+        return plan
+
+    def assign_foreign_key_index(self, columns):
+        """
+        Assign index for given foreign key columns.
+
+        If the ``partial_foreign_key_indexes`` option is enabled for all of
+        the columns and all of them are nullable, the index is created as a
+        partial index covering only non-NULL rows on dialects supporting
+        partial indexes (PostgreSQL and SQLite). Other dialects create a
+        regular index.
+        """
+        partial = all(
+            column.nullable and
+            self.get_column_options(column)['partial_foreign_key_indexes']
+            for column in columns
+        )
+        if len(columns) == 1:
+            name = None
+        else:
+            name = 'ix_%s_%s' % (
+                self.table.name,
+                '_'.join(column.name for column in columns)
             )
-            self.table.append_constraint(constraint)
+        self.apply(
+            'partial_foreign_key_indexes' if partial else 'index_foreign_keys',
+            'index',
+            name,
+            [column.key for column in columns],
+            partial
+        )
 
-    def assign_foreign_key_indexes(self, column):
+    def assign_foreign_key_indexes(self):
         """
-        Assign index for column if column has foreign key constraints.
+        Assign indexes for foreign key columns which are not already covered
+        by an existing index.
         """
-        if column.foreign_keys:
-            column.index = True
+        for columns in self.plan_foreign_key_indexes():
+            self.assign_foreign_key_index(columns)
 
     def assign_datetime_auto_now(self, column):
         """
         Assigns datetime auto now defaults
+
+        The ``auto_now`` column info argument can be one of
+
+        * True - Python side ``datetime.utcnow`` default evaluated per row
+          and ``now()`` server default
+        * ``'batch'`` - Python side default evaluated once per statement
+          execution (eg. once per ``executemany`` batch) and ``now()`` server
+          default
+        * ``'server'`` - ``now()`` server default only
         """
-        if column.info.get('auto_now'):
-            column.default = sa.schema.ColumnDefault(datetime.utcnow)
+        auto_now = column.info.get('auto_now')
+        if auto_now:
+            if auto_now == 'batch':
+                self.apply(
+                    'auto_now', 'callable_default', column.key, 'batch_utcnow'
+                )
+            elif auto_now != 'server':
+                self.apply(
+                    'auto_now', 'callable_default', column.key, 'utcnow'
+                )
             if not column.server_default:
                 # Does not support MySQL < 5.6.5
-                column.server_default = sa.schema.DefaultClause(sa.func.now())
+                self.apply('auto_now', 'sql_server_default', column.key, 'now')
 
     def assign_numeric_defaults(self, column):
         """
@@ -116,7 +624,10 @@ class ModelConfigurator(object):
         """
         if column.default is not None and hasattr(column.default, 'arg'):
             if not column.server_default:
-                column.server_default = sa.schema.DefaultClause(
+                self.apply(
+                    'numeric_defaults',
+                    'server_default',
+                    column.key,
                     six.text_type(column.default.arg)
                 )
 
@@ -127,7 +638,10 @@ class ModelConfigurator(object):
         if column.default is not None and column.server_default is None and (
             isinstance(column.default.arg, six.text_type)
         ):
-            column.server_default = sa.schema.DefaultClause(
+            self.apply(
+                'string_defaults',
+                'server_default',
+                column.key,
                 column.default.arg
             )
 
@@ -136,56 +650,345 @@ class ModelConfigurator(object):
         Assigns int column server_default based on column default value
         """
         if column.default is None:
-            column.default = sa.schema.ColumnDefault(False)
+            self.apply('boolean_defaults', 'default', column.key, False)
 
         if column.default is not None:
-            if column.default.arg is False:
-                column.server_default = sa.schema.DefaultClause(
-                    sa.sql.expression.false()
-                )
+            self.apply(
+                'boolean_defaults',
+                'sql_server_default',
+                column.key,
+                'false' if column.default.arg is False else 'true'
+            )
+
+    def assign_enum_name(self, column):
+        """
+        Assigns a name for enum types which don't have the name set. Enums
+        with the same values in the same order share the same name across
+        the whole MetaData, so that each type is created only once.
+        """
+        type_ = resolve_type(column.type)
+        if isinstance(type_, sa.Enum):
+            registry = get_enum_registry(self.table.metadata)
+            if getattr(type_, 'name', None):
+                registry.register(type_.enums, type_.name)
             else:
-                column.server_default = sa.schema.DefaultClause(
-                    sa.sql.expression.true()
+                self.apply(
+                    'enum_names',
+                    'enum_name',
+                    column.key,
+                    registry.name_for(
+                        type_.enums,
+                        column.name,
+                        self.table.name
+                    )
                 )
 
-    def assign_type_defaults(self, column):
-        if (isinstance(column.type, sa.Boolean) and
-                self.get_option('boolean_defaults')):
-            self.assign_boolean_defaults(column)
+    def assign_choice_codes(self, column):
+        """
+        Replace the type of a string column having choices with ChoiceCode,
+        which stores the choices as small integer codes. A string server
+        default is converted to its code and a check constraint restricting
+        the column to valid codes is generated.
+        """
+        choices = column.info.get('choices')
+        type_ = resolve_type(column.type)
+        if (
+            not choices or
+            not isinstance(type_, sa.String) or
+            isinstance(type_, sa.Enum)
+        ):
+            return
+        self.apply(
+            'compact_choices',
+            'choice_codes',
+            column.key,
+            choice_values(choices)
+        )
+        server_default = column.server_default
+        if (
+            isinstance(server_default, sa.schema.DefaultClause) and
+            isinstance(server_default.arg, six.string_types) and
+            server_default.arg in column.type.codes
+        ):
+            self.apply(
+                'compact_choices',
+                'server_default',
+                column.key,
+                six.text_type(column.type.codes[server_default.arg])
+            )
+        self.apply(
+            'compact_choices',
+            'check',
+            self.check_constraint_name('%s_choices' % column.name),
+            [(column.key, 'code_range', len(column.type.choices))]
+        )
 
-        elif (is_string(column.type) and self.get_option('string_defaults')):
-            self.assign_string_defaults(column)
+    def assign_type_defaults(self, column, options=None):
+        """
+        Assigns type specific defaults using the first handler whose option
+        is enabled.
+        """
+        if options is None:
+            options = self.get_column_options(column)
+        for option, method in self.manager.get_type_handlers(column.type):
+            if options[option]:
+                getattr(self, method)(column)
+                break
 
-        elif (is_numeric(column.type) and self.get_option('numeric_defaults')):
-            self.assign_numeric_defaults(column)
+    def validate_column(self, column):
+        """
+        Validate the options and the ``auto_now`` mode of given column.
 
-        elif (
-            (
-                isinstance(column.type, sa.Date) or
-                isinstance(column.type, sa.DateTime)
-            ) and
-            self.get_option('auto_now')
-        ):
-            self.assign_datetime_auto_now(column)
+        :raises ValueError: if an option or mode is unknown
+        """
+        check_mode = self.get_column_options(column)[
+            'min_max_check_constraints'
+        ]
+        if check_mode not in CHECK_CONSTRAINT_MODES:
+            raise ValueError(
+                'Unknown min_max_check_constraints mode %r' % check_mode
+            )
+        auto_now = column.info.get('auto_now')
+        if auto_now and auto_now not in AUTO_NOW_MODES:
+            raise ValueError('Unknown auto_now mode %r' % auto_now)
 
-        elif (isinstance(column.type, sa.Enum) and
-                self.get_option('enum_names')):
-            if (not hasattr(column.type, 'name') or not
-                    column.type.name):
-                column.type.name = '%s_enum' % column.name
+    def configure_column(self, column, table_checks):
+        """
+        Configure given column. Check conditions of the ``'table'``
+        min_max_check_constraints mode are appended to given list of table
+        checks.
+        """
+        options = self.get_column_options(column)
+        check_mode = options['min_max_check_constraints']
+        if check_mode == 'table':
+            table_checks.extend(self.min_max_checks(column, between=True))
+        elif check_mode:
+            self.append_check_constraints(column, check_mode)
+
+        self.assign_type_defaults(column, options)
+        if options['enum_names']:
+            self.assign_enum_name(column)
+        if options['compact_choices']:
+            self.assign_choice_codes(column)
 
     def __call__(self):
+        # All columns are validated before any of them is configured, so
+        # that a failed configuration leaves the table untouched and can be
+        # retried.
+        for column in self.table.columns:
+            self.validate_column(column)
+        table_checks = []
         for column in self.table.columns:
-            if self.get_option('min_max_check_constraints'):
-                self.append_check_constraints(column)
+            self.configure_column(column, table_checks)
+        self.append_table_check_constraint(table_checks)
+        self.assign_foreign_key_indexes()
+
+
+def choice_values(choices):
+    """
+    Return the values of given choices. Choices can be given either as plain
+    values or as (value, label) tuples.
+    """
+    return [
+        choice[0] if isinstance(choice, (tuple, list)) else choice
+        for choice in choices
+    ]
+
+
+def check_condition(table, key, operator, *values):
+    """
+    Return check condition expression for given column key, operator and
+    values. Operator is one of ``'>='``, ``'<='``, ``'between'`` and
+    ``'code_range'`` (choice codes from zero to given number of choices).
+
+    String values of numeric columns are converted back to decimals.
+    """
+    column = table.c[key]
+    if isinstance(resolve_type(column.type), sa.Numeric):
+        values = [
+            Decimal(value) if isinstance(value, six.string_types) else value
+            for value in values
+        ]
+    if operator == '>=':
+        return column >= values[0]
+    if operator == '<=':
+        return column <= values[0]
+    if operator == 'between':
+        return column.between(values[0], values[1])
+    if operator == 'code_range':
+        return sa.type_coerce(column, sa.SmallInteger()).between(
+            0, values[0] - 1
+        )
+    raise ValueError('Unknown check operator %r' % operator)
+
+
+def final_name(name):
+    """
+    Mark given generated name as final, so that SQLAlchemy truncates it
+    (with a hash suffix) when it exceeds the identifier length limit of the
+    dialect instead of raising an error.
+    """
+    return None if name is None else sa.schema.conv(name)
+
+
+def apply_check(table, name, checks):
+    conditions = [check_condition(table, *check) for check in checks]
+    if 'ck' not in table.metadata.naming_convention:
+        # Otherwise the name is the constraint_name token of the naming
+        # convention, which produces an already truncatable name.
+        name = final_name(name)
+    table.append_constraint(
+        sa.schema.CheckConstraint(
+            conditions[0] if len(conditions) == 1 else sa.and_(*conditions),
+            name=name,
+            info=generated_info()
+        )
+    )
+
+
+def apply_index(table, name, keys, partial):
+    columns = [table.c[key] for key in keys]
+    name = final_name(name)
+    if partial:
+        condition = sa.and_(*[column.isnot(None) for column in columns])
+        sa.Index(
+            name,
+            *columns,
+            sqlite_where=condition,
+            postgresql_where=condition,
+            info=generated_info()
+        )
+    elif len(columns) == 1:
+        column = columns[0]
+        column.index = True
+        # Flagged as a column index, like indexes created by
+        # Column(index=True), so that table copies don't duplicate it.
+        sa.Index(name, column, _column_flag=True, info=generated_info())
+    else:
+        sa.Index(name, *columns, info=generated_info())
+
+
+def apply_default(table, key, value):
+    table.c[key].default = sa.schema.ColumnDefault(value)
+
+
+def apply_callable_default(table, key, name):
+    table.c[key].default = sa.schema.ColumnDefault(CALLABLE_DEFAULTS[name])
+
+
+def apply_server_default(table, key, text):
+    table.c[key].server_default = sa.schema.DefaultClause(text)
+
+
+def apply_sql_server_default(table, key, name):
+    table.c[key].server_default = sa.schema.DefaultClause(
+        SQL_SERVER_DEFAULTS[name]()
+    )
+
+
+def apply_enum_name(table, key, name):
+    type_ = resolve_type(table.c[key].type)
+    type_.name = name
+    get_enum_registry(table.metadata).register(type_.enums, name)
+
+
+def apply_choice_codes(table, key, choices):
+    table.c[key].type = ChoiceCode(choices)
+
 
-            if self.get_option('index_foreign_keys'):
-                self.assign_foreign_key_indexes(column)
-            self.assign_type_defaults(column)
+def apply_operation(table, operation, args):
+    """
+    Apply given configuration operation with given arguments to given table.
+    """
+    OPERATIONS[operation](table, *args)
+
+
+def generated_info():
+    """
+    Return info dict for tagging schema items generated by
+    ModelConfigurator.
+    """
+    return {GENERATED_BY: 'ModelConfigurator'}
+
+
+def is_generated(item):
+    """
+    Return whether or not given schema item (eg. Index or CheckConstraint)
+    was generated by ModelConfigurator.
+    """
+    return GENERATED_BY in item.info
+
+
+def batch_utcnow(context):
+    """
+    Return the current UTC datetime, evaluated once per execution context.
+    All rows inserted using the same statement execution share the same
+    timestamp.
+    """
+    try:
+        return _batch_timestamps[context]
+    except KeyError:
+        now = _batch_timestamps[context] = datetime.utcnow()
+        return now
+
+
+def configure_once(table, configure):
+    """
+    Call given configure function unless given table has already been
+    configured. Configuration is serialized using a re-entrant lock and a
+    table whose configuration fails can be configured again.
+
+    :return: True if the function was called, False otherwise
+    """
+    with _configure_lock:
+        if table in _configured_tables:
+            return False
+        _configured_tables.add(table)
+        try:
+            configure()
+        except Exception:
+            _configured_tables.discard(table)
+            raise
+    return True
+
+
+def is_configured(table):
+    """
+    Return whether or not given table has already been configured.
+    """
+    return table in _configured_tables
+
+
+def get_plan(table):
+    """
+    Return the configuration plan applied to given table or None if the
+    table hasn't been configured.
+    """
+    return _table_plans.get(table)
+
+
+def resolve_type(type_):
+    """
+    Return the underlying type of given type, unwrapping TypeDecorators.
+    """
+    while isinstance(type_, sa.types.TypeDecorator):
+        type_ = type_.impl
+    return type_
 
 
 def bool_or_str(type_):
-    return is_string(type_) or is_boolean(type_)
+    """
+    Return whether or not given type or type class is a string or a boolean
+    type. The result is cached per type class.
+    """
+    type_cls = type_ if isclass(type_) else type_.__class__
+    try:
+        return _bool_or_str_types[type_cls]
+    except KeyError:
+        result = _bool_or_str_types[type_cls] = issubclass(
+            type_cls, (sa.String, sa.Boolean)
+        )
+        return result
 
 
 def is_string(type_):
@@ -203,16 +1006,201 @@ def is_boolean(type_):
 
 
 def is_numeric(type_):
-    return any(
-        isinstance(type_, type_cls)
-        for type_cls in (sa.Integer, sa.Float, sa.Numeric)
-    )
+    return isinstance(type_, (sa.Integer, sa.Float, sa.Numeric))
+
+
+def get_tables(target):
+    """
+    Return a list of (table, model) tuples for all tables of given MetaData,
+    declarative registry or declarative base class. Model is the mapped class
+    owning the table or None if the table has no mapper or a MetaData was
+    given.
+    """
+    registry = getattr(target, 'registry', target)
+    metadata = getattr(registry, 'metadata', target)
+    models = {}
+    for mapper in getattr(registry, 'mappers', ()):
+        table = mapper.local_table
+        parent = mapper.inherits
+        if (
+            isinstance(table, sa.Table) and
+            (parent is None or parent.local_table is not table)
+        ):
+            models[table] = mapper.class_
+    return [
+        (table, models.get(table)) for table in metadata.tables.values()
+    ]
+
 
+def configure_metadata(target, manager=None):
+    """
+    Configure all tables of given MetaData, declarative registry or
+    declarative base class in a single pass.
 
-def make_lazy_configured(mapper):
-    manager = ConfigurationManager()
+    Unlike :func:`make_lazy_configured` this configures every table including
+    Core tables without mappers, reflected tables and tables of imperatively
+    mapped classes. Model options are read from the ``__lazy_options__`` of
+    mapped classes when a registry or a declarative base is given.
+
+    :param target: MetaData, registry or declarative base class
+    :param manager:
+        Optional ConfigurationManager. All tables are configured using the
+        same manager and thus share its caches.
+    :return: the ConfigurationManager used
+    """
+    if manager is None:
+        manager = ConfigurationManager()
+    for table, model in get_tables(target):
+        manager.configure_table(table, model)
+    return manager
+
+
+def make_lazy_configured(mapper, manager=None):
+    if manager is None:
+        manager = ConfigurationManager()
     sa.event.listen(
         mapper,
         'mapper_configured',
         manager
     )
+
+
+class DeferredConfigurationManager(ConfigurationManager):
+    """
+    ConfigurationManager which defers configuring each table until it is
+    first needed:
+
+    - when the table is created (``create_all`` or ``Table.create``)
+    - when an INSERT, UPDATE or DELETE statement targeting the table is
+      executed
+    - when an object mapped to the table is flushed
+
+    Processes which use only a few of many mapped tables thus don't pay for
+    configuring the rest. Each table is still configured at most once, also
+    when triggered from several threads. ::
+
+
+        make_lazy_configured(sa.orm.Mapper, DeferredConfigurationManager())
+    """
+    def defer_table(self, table, model=None):
+        """
+        Register given table to be configured when it is first needed.
+        """
+        with _configure_lock:
+            if is_configured(table) or table in _deferred_tables:
+                return
+            _deferred_tables[table] = (self, model)
+            install_execute_hook()
+            sa.event.listen(
+                table,
+                'before_create',
+                configure_deferred_on_create,
+                insert=True
+            )
+            if table.metadata not in _deferred_metadata:
+                _deferred_metadata.add(table.metadata)
+                sa.event.listen(
+                    table.metadata,
+                    'before_create',
+                    configure_deferred_on_create,
+                    insert=True
+                )
+
+    def __call__(self, mapper, class_):
+        if hasattr(class_, '__lazy_options__'):
+            self.defer_table(class_.__table__, class_)
+            sa.event.listen(
+                mapper,
+                'before_insert',
+                configure_deferred_on_flush
+            )
+            sa.event.listen(
+                mapper,
+                'before_update',
+                configure_deferred_on_flush
+            )
+
+
+def configure_deferred_table(table):
+    """
+    Configure given table if its configuration has been deferred by a
+    DeferredConfigurationManager.
+
+    :return: True if the table was configured, False otherwise
+    """
+    try:
+        manager, model = _deferred_tables[table]
+    except KeyError:
+        return False
+    # The table stays registered until configured, so that other threads
+    # triggering it meanwhile wait for the configuration to finish.
+    configured = manager.configure_table(table, model)
+    with _configure_lock:
+        _deferred_tables.pop(table, None)
+    return configured
+
+
+def configure_deferred(metadata=None):
+    """
+    Configure all deferred tables of given MetaData or all deferred tables
+    if no MetaData is given.
+    """
+    # Other threads remove configured tables meanwhile.
+    with _configure_lock:
+        tables = list(_deferred_tables.keys())
+    for table in tables:
+        if metadata is None or table.metadata is metadata:
+            configure_deferred_table(table)
+
+
+def configure_deferred_on_create(target, connection, tables=None, **kw):
+    if isinstance(target, sa.MetaData):
+        for table in target.tables.values() if tables is None else tables:
+            configure_deferred_table(table)
+    else:
+        configure_deferred_table(target)
+
+
+def configure_deferred_on_flush(mapper, connection, target):
+    for table in mapper.tables:
+        configure_deferred_table(table)
+
+
+def configure_deferred_on_execute(connection, clauseelement, *args):
+    if _deferred_tables and isinstance(clauseelement, UpdateBase):
+        configure_deferred_table(clauseelement.table)
+
+
+def install_execute_hook():
+    """
+    Install the Engine level hook configuring deferred tables on their
+    first INSERT, UPDATE or DELETE. The hook is installed only once.
+    """
+    with _configure_lock:
+        if not _execute_hook_installed:
+            sa.event.listen(
+                sa.engine.Engine,
+                'before_execute',
+                configure_deferred_on_execute
+            )
+            _execute_hook_installed.append(True)
+
+
+#: Callable Python side defaults, referenced by name in operations
+CALLABLE_DEFAULTS = {
+    'utcnow': datetime.utcnow,
+    'batch_utcnow': batch_utcnow,
+}
+
+#: Configuration operations by name. Each operation takes the table as the
+#: first argument followed by JSON serializable arguments.
+OPERATIONS = {
+    'check': apply_check,
+    'index': apply_index,
+    'default': apply_default,
+    'callable_default': apply_callable_default,
+    'server_default': apply_server_default,
+    'sql_server_default': apply_sql_server_default,
+    'enum_name': apply_enum_name,
+    'choice_codes': apply_choice_codes,
+}
@@ -0,0 +1,123 @@
+# -*- coding: utf-8 -*-
+"""
+Helpers for bulk inserting plain dict rows into configured tables.
+"""
+from datetime import datetime
+from itertools import islice
+
+from sqlalchemy_defaults import batch_utcnow
+
+
+class BulkDefaults(object):
+    """
+    Python side column defaults of a table, precomputed once per column, for
+    filling missing keys of plain dict rows before bulk inserts.
+
+    Scalar defaults are copied as is. Callable defaults which do not take an
+    execution context (eg. ``datetime.utcnow`` assigned by ``auto_now``) are
+    evaluated per row or once per batch depending on the ``callables``
+    argument. Defaults using the execution context and SQL expression
+    defaults are left for SQLAlchemy to handle.
+
+    ::
+
+
+        defaults = BulkDefaults(Event.__table__, callables='batch')
+        defaults.insert(connection, rows, batch_size=5000)
+
+
+    :param table: Table to compute the defaults for
+    :param callables:
+        ``'row'`` to evaluate callable defaults for each row or ``'batch'``
+        to evaluate them once per batch
+    """
+    def __init__(self, table, callables='row'):
+        if callables not in ('row', 'batch'):
+            raise ValueError('Unknown callables mode %r' % callables)
+        self.table = table
+        self.callables = callables
+        self.scalars = {}
+        self.row_callables = []
+        self.batch_callables = []
+        for column in table.columns:
+            default = column.default
+            if default is None or not hasattr(default, 'arg'):
+                continue
+            if default.is_scalar:
+                self.scalars[column.key] = default.arg
+            elif default.is_callable:
+                if default.arg is batch_utcnow:
+                    self.batch_callables.append((column.key, datetime.utcnow))
+                    continue
+                # Zero argument callables are wrapped by SQLAlchemy
+                func = getattr(default.arg, '__wrapped__', None)
+                if func is None:
+                    continue
+                if callables == 'batch':
+                    self.batch_callables.append((column.key, func))
+                else:
+                    self.row_callables.append((column.key, func))
+
+    @property
+    def keys(self):
+        """
+        Keys of the columns whose defaults are filled.
+        """
+        return (
+            set(self.scalars) |
+            set(key for key, _ in self.row_callables) |
+            set(key for key, _ in self.batch_callables)
+        )
+
+    def fill(self, rows):
+        """
+        Return a list of new dicts, one for each of given rows, with missing
+        default values filled. Given rows are not modified.
+
+        :param rows: iterable of dicts
+        """
+        base = dict(self.scalars)
+        for key, func in self.batch_callables:
+            base[key] = func()
+        row_callables = self.row_callables
+        filled_rows = []
+        for row in rows:
+            filled = base.copy()
+            filled.update(row)
+            for key, func in row_callables:
+                if key not in row:
+                    filled[key] = func()
+            filled_rows.append(filled)
+        return filled_rows
+
+    def batches(self, rows, batch_size=1000):
+        """
+        Yield lists of at most ``batch_size`` filled rows. Rows are consumed
+        lazily, so given rows can be a generator which does not fit in
+        memory.
+
+        :param rows: iterable of dicts
+        :param batch_size: maximum number of rows per batch
+        """
+        iterator = iter(rows)
+        while True:
+            batch = self.fill(islice(iterator, batch_size))
+            if not batch:
+                return
+            yield batch
+
+    def insert(self, connection, rows, batch_size=1000):
+        """
+        Insert given rows using one ``executemany`` per batch.
+
+        :param connection: Connection to execute the inserts with
+        :param rows: iterable of dicts
+        :param batch_size: maximum number of rows per batch
+        :return: number of inserted rows
+        """
+        statement = self.table.insert()
+        count = 0
+        for batch in self.batches(rows, batch_size):
+            connection.execute(statement, batch)
+            count += len(batch)
+        return count
@@ -0,0 +1,234 @@
+# -*- coding: utf-8 -*-
+"""
+Command line interface.
+
+``ddl`` imports a models module, configures its tables and writes the
+generated DDL of each given dialect to standard output or to
+``<dialect>.sql`` files in an output directory::
+
+
+    python -m sqlalchemy_defaults ddl myapp.models \\
+        --dialect sqlite --dialect postgresql --output-dir schema/
+
+
+Statements are written as soon as they have been compiled, so the DDL of a
+large schema is never held in memory. Several dialects are compiled in
+parallel in a process pool.
+"""
+import argparse
+import importlib
+import io
+import multiprocessing
+import os
+import shutil
+import sys
+import tempfile
+
+import sqlalchemy as sa
+
+from sqlalchemy_defaults import (
+    ConfigurationManager,
+    configure_deferred,
+    configure_metadata,
+    get_tables
+)
+from sqlalchemy_defaults.ddl import emit_create_all
+
+
+def get_dialect(name):
+    """
+    Return a dialect instance for given dialect name, eg. ``'postgresql'``
+    or ``'mysql+pymysql'``. The DBAPI of the dialect isn't needed.
+    """
+    return sa.engine.url.make_url(name + '://').get_dialect()()
+
+
+def find_target(module, name=None):
+    """
+    Return the MetaData, registry or declarative base of given module. If no
+    attribute name is given ``Base``, ``metadata`` and ``registry`` are
+    tried in this order, then any MetaData instance in the module.
+    """
+    if name is not None:
+        target = module
+        for part in name.split('.'):
+            target = getattr(target, part)
+        return target
+    for attribute in ('Base', 'metadata', 'registry'):
+        if hasattr(module, attribute):
+            return getattr(module, attribute)
+    for value in vars(module).values():
+        if isinstance(value, sa.MetaData):
+            return value
+    raise ValueError(
+        'No MetaData found in module %r. Use --target to name it.' %
+        module.__name__
+    )
+
+
+def load_metadata(module_name, target_name=None, configure_core_tables=False):
+    """
+    Import given module and return the configured MetaData of its target.
+
+    For a declarative base or registry the tables are configured like the
+    application configures them: mappers are configured first, so that
+    models using ``make_lazy_configured`` are configured with their own
+    managers, and of the remaining tables only those of models with
+    ``__lazy_options__`` are configured. Core tables without a mapper are
+    configured only if ``configure_core_tables`` is True. A plain MetaData
+    is configured with :func:`configure_metadata`.
+    """
+    target = find_target(importlib.import_module(module_name), target_name)
+    registry = getattr(target, 'registry', target)
+    metadata = getattr(registry, 'metadata', target)
+    if not hasattr(registry, 'mappers'):
+        configure_metadata(target)
+        return metadata
+    sa.orm.configure_mappers()
+    configure_deferred(metadata)
+    manager = ConfigurationManager()
+    for table, model in get_tables(target):
+        if (
+            configure_core_tables
+            if model is None
+            else hasattr(model, '__lazy_options__')
+        ):
+            manager.configure_table(table, model)
+    return metadata
+
+
+def write_ddl(metadata, dialect_name, stream):
+    """
+    Write the DDL of given metadata for given dialect to given text stream,
+    statement by statement.
+    """
+    def emit(statement):
+        stream.write(statement)
+        stream.write(u';\n\n')
+
+    emit_create_all(metadata, get_dialect(dialect_name), emit)
+
+
+def export_ddl(args):
+    """
+    Write the DDL of a single dialect to a file. Run in worker processes,
+    which import and configure the models module themselves.
+
+    :param args:
+        (module name, target name, configure core tables, dialect name, path)
+        tuple
+    """
+    (
+        module_name,
+        target_name,
+        configure_core_tables,
+        dialect_name,
+        path
+    ) = args
+    metadata = load_metadata(module_name, target_name, configure_core_tables)
+    with io.open(path, 'w', encoding='utf-8') as stream:
+        write_ddl(metadata, dialect_name, stream)
+    return path
+
+
+def ddl(options):
+    if os.getcwd() not in sys.path:
+        sys.path.insert(0, os.getcwd())
+    dialects = options.dialect or ['sqlite']
+    for name in dialects:
+        get_dialect(name)
+    if options.output_dir is None and len(dialects) == 1:
+        write_ddl(
+            load_metadata(
+                options.module,
+                options.target,
+                options.configure_core_tables
+            ),
+            dialects[0],
+            sys.stdout
+        )
+        return
+
+    directory = options.output_dir or tempfile.mkdtemp()
+    if not os.path.isdir(directory):
+        os.makedirs(directory)
+    jobs = [
+        (
+            options.module,
+            options.target,
+            options.configure_core_tables,
+            name,
+            os.path.join(directory, name.replace('+', '_') + '.sql')
+        )
+        for name in dialects
+    ]
+    pool = multiprocessing.Pool(min(options.jobs, len(jobs)))
+    try:
+        paths = pool.map(export_ddl, jobs, chunksize=1)
+    finally:
+        pool.close()
+        pool.join()
+
+    if options.output_dir is None:
+        try:
+            for name, path in zip(dialects, paths):
+                sys.stdout.write(u'-- %s\n\n' % name)
+                with io.open(path, encoding='utf-8') as stream:
+                    shutil.copyfileobj(stream, sys.stdout)
+        finally:
+            shutil.rmtree(directory)
+
+
+def positive_int(value):
+    number = int(value)
+    if number < 1:
+        raise argparse.ArgumentTypeError('must be at least 1')
+    return number
+
+
+def get_parser():
+    parser = argparse.ArgumentParser(prog='python -m sqlalchemy_defaults')
+    commands = parser.add_subparsers(dest='command')
+    commands.required = True
+    parser_ddl = commands.add_parser(
+        'ddl',
+        help='write the generated DDL of a models module'
+    )
+    parser_ddl.add_argument('module', help='models module, eg. myapp.models')
+    parser_ddl.add_argument(
+        '--target',
+        help='name of the MetaData, registry or declarative base in the '
+             'module (default: Base, metadata or registry)'
+    )
+    parser_ddl.add_argument(
+        '--configure-core-tables',
+        action='store_true',
+        help='also configure Core tables without a mapper when the target is '
+             'a declarative base or registry (only mapped classes with '
+             '__lazy_options__ are configured by default, a plain MetaData '
+             'target is always configured as a whole)'
+    )
+    parser_ddl.add_argument(
+        '--dialect',
+        action='append',
+        help='dialect to compile the DDL for, may be given several times '
+             '(default: sqlite)'
+    )
+    parser_ddl.add_argument(
+        '--output-dir',
+        help='write <dialect>.sql files into this directory instead of '
+             'standard output'
+    )
+    parser_ddl.add_argument(
+        '--jobs',
+        type=positive_int,
+        default=multiprocessing.cpu_count(),
+        help='number of worker processes (default: number of CPUs)'
+    )
+    parser_ddl.set_defaults(handler=ddl)
+    return parser
+
+
+def main(argv=None):
+    options = get_parser().parse_args(argv)
+    options.handler(options)
@@ -0,0 +1,223 @@
+# -*- coding: utf-8 -*-
+"""
+Vectorized validation of columnar data (dicts of NumPy arrays, pandas
+DataFrames or Arrow tables) against the ``min``, ``max`` and ``choices``
+column info arguments and the nullability of table columns.
+
+Requires NumPy::
+
+
+    from sqlalchemy_defaults.columnar import validate_columns
+
+
+    report = validate_columns(Event.__table__, dataframe)
+    connection.execute(
+        Event.__table__.insert(),
+        dataframe[report.valid_mask].to_dict('records')
+    )
+"""
+from datetime import date, datetime
+
+import sqlalchemy as sa
+
+from sqlalchemy_defaults import choice_values
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+
+class ColumnarReport(object):
+    """
+    Result of columnar validation.
+
+    :param row_count: number of validated rows
+    :param violations:
+        dict with (column key, reason) tuples as keys and boolean arrays as
+        values. Reason is one of ``'missing'``, ``'null'``, ``'choices'``,
+        ``'min'`` and ``'max'``.
+    """
+    def __init__(self, row_count, violations):
+        self.row_count = row_count
+        self.violations = violations
+        mask = np.zeros(row_count, dtype=bool)
+        for violation in violations.values():
+            mask |= violation
+        #: Boolean array which is True for each row having any violation
+        self.mask = mask
+
+    @property
+    def valid(self):
+        return not self.mask.any()
+
+    @property
+    def valid_mask(self):
+        return ~self.mask
+
+    @property
+    def invalid_rows(self):
+        """
+        Array of indexes of invalid rows.
+        """
+        return np.flatnonzero(self.mask)
+
+    def counts(self):
+        """
+        Return a dict of violation counts keyed by (column key, reason)
+        tuples. Only violations occurring at least once are included.
+        """
+        counts = {}
+        for key, violation in self.violations.items():
+            count = int(violation.sum())
+            if count:
+                counts[key] = count
+        return counts
+
+    def __repr__(self):
+        return '<ColumnarReport rows=%d invalid=%d>' % (
+            self.row_count,
+            int(self.mask.sum())
+        )
+
+
+def column_names(data):
+    """
+    Return the column names of given columnar data.
+    """
+    if hasattr(data, 'column_names'):
+        # Arrow table
+        return set(data.column_names)
+    if hasattr(data, 'columns'):
+        # pandas DataFrame
+        return set(data.columns)
+    return set(data.keys())
+
+
+def to_array(values):
+    """
+    Convert given column values (Arrow array, pandas Series or any sequence)
+    into a NumPy array.
+    """
+    if hasattr(values, 'to_numpy'):
+        try:
+            return values.to_numpy(zero_copy_only=False)
+        except TypeError:
+            return values.to_numpy()
+    return np.asarray(values)
+
+
+def get_column(data, name):
+    """
+    Return a tuple of the values of given column as a NumPy array and its
+    null mask. Arrow and pandas columns provide their own null masks.
+    """
+    if hasattr(data, 'column_names'):
+        column = data.column(name)
+        return to_array(column), to_array(column.is_null())
+    column = data[name]
+    if hasattr(column, 'isna'):
+        return to_array(column), to_array(column.isna())
+    values = to_array(column)
+    return values, null_mask(values)
+
+
+def null_mask(values):
+    """
+    Return a boolean array which is True for each null value (None, NaN or
+    NaT) in given array.
+    """
+    kind = values.dtype.kind
+    if kind == 'f':
+        return np.isnan(values)
+    if kind in 'mM':
+        return np.isnat(values)
+    if kind == 'O':
+        # NaN is the only value not equal to itself.
+        return np.asarray(
+            np.equal(values, None) | np.not_equal(values, values),
+            dtype=bool
+        )
+    return np.zeros(len(values), dtype=bool)
+
+
+def bound(value, values):
+    """
+    Convert given min or max value to be comparable with given array.
+    """
+    if values.dtype.kind == 'M' and isinstance(value, (date, datetime)):
+        return np.datetime64(value)
+    return value
+
+
+def is_required(column):
+    """
+    Return whether or not given column requires a non-null value from the
+    inserted data.
+    """
+    return not (
+        column.nullable or
+        column.default is not None or
+        column.server_default is not None or
+        (column.primary_key and isinstance(column.type, sa.Integer))
+    )
+
+
+def validate_columns(table, data):
+    """
+    Validate given columnar data against the columns of given table.
+
+    Invalid rows don't raise; all violations are collected into the returned
+    report.
+
+    :param table: Table whose column info arguments are checked
+    :param data: dict of arrays, pandas DataFrame or Arrow table
+    :return: ColumnarReport
+    """
+    if np is None:
+        raise ImportError('Columnar validation requires NumPy.')
+    names = column_names(data)
+    arrays = dict(
+        (column.key, get_column(data, column.key))
+        for column in table.columns
+        if column.key in names
+    )
+    lengths = set(len(values) for values, nulls in arrays.values())
+    if len(lengths) > 1:
+        raise ValueError('Columns have different lengths.')
+    row_count = lengths.pop() if lengths else 0
+
+    violations = {}
+    for column in table.columns:
+        key = column.key
+        if key not in arrays:
+            if is_required(column):
+                violations[(key, 'missing')] = np.ones(row_count, dtype=bool)
+            continue
+        values, nulls = arrays[key]
+        if is_required(column):
+            violations[(key, 'null')] = nulls
+
+        info = column.info
+        choices = info.get('choices')
+        min_ = info.get('min')
+        max_ = info.get('max')
+        if not choices and min_ is None and max_ is None:
+            continue
+        not_null = ~nulls
+        present = values[not_null]
+        if choices:
+            violation = np.zeros(row_count, dtype=bool)
+            violation[not_null] = ~np.isin(
+                present, choice_values(choices)
+            )
+            violations[(key, 'choices')] = violation
+        if min_ is not None:
+            violation = np.zeros(row_count, dtype=bool)
+            violation[not_null] = present < bound(min_, present)
+            violations[(key, 'min')] = violation
+        if max_ is not None:
+            violation = np.zeros(row_count, dtype=bool)
+            violation[not_null] = present > bound(max_, present)
+            violations[(key, 'max')] = violation
+    return ColumnarReport(row_count, violations)
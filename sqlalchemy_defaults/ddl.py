@@ -0,0 +1,465 @@
+# -*- coding: utf-8 -*-
+"""
+Two phase DDL for configured metadata.
+
+Loading large amounts of data is much faster without the indexes and check
+constraints generated by ModelConfigurator. :func:`create_tables` creates the
+tables without them and :func:`create_post_load` creates them after the data
+has been loaded::
+
+
+    from sqlalchemy_defaults.ddl import create_post_load, create_tables
+
+
+    create_tables(Base.metadata, engine)
+    load_data(engine)
+    create_post_load(Base.metadata, engine)
+
+
+Compiling the DDL of a large metadata is relatively slow. :class:`DDLCache`
+caches the compiled statements per dialect and metadata fingerprint, in memory
+and optionally on disk, so that creating the same schema again (eg. once per
+test) only executes them::
+
+
+    from sqlalchemy_defaults.ddl import DDLCache
+
+
+    cache = DDLCache(directory='.ddl_cache')
+    cache.create_all(Base.metadata, engine)
+"""
+import hashlib
+import json
+import os
+import tempfile
+import threading
+import weakref
+from contextlib import contextmanager
+
+import six
+import sqlalchemy as sa
+from sqlalchemy.engine.mock import MockConnection
+from sqlalchemy.schema import AddConstraint, CreateIndex, CreateTable
+
+from sqlalchemy_defaults import is_generated
+from sqlalchemy_defaults.plan import default_signature, stable_repr
+
+_detach_lock = threading.Lock()
+
+_table_fingerprints = weakref.WeakKeyDictionary()
+
+
+def generated_indexes(table):
+    """
+    Return a list of indexes of given table generated by ModelConfigurator.
+    """
+    return [index for index in table.indexes if is_generated(index)]
+
+
+def generated_constraints(table):
+    """
+    Return a list of constraints of given table generated by
+    ModelConfigurator.
+    """
+    return [
+        constraint for constraint in table.constraints
+        if is_generated(constraint)
+    ]
+
+
+@contextmanager
+def connect(bind):
+    if isinstance(bind, sa.engine.Engine):
+        with bind.begin() as connection:
+            yield connection
+    else:
+        yield bind
+
+
+@contextmanager
+def detached_generated_objects(metadata):
+    """
+    Temporarily detach generated indexes and constraints from all tables of
+    given metadata.
+    """
+    with _detach_lock:
+        detached = []
+        for table in metadata.tables.values():
+            indexes = generated_indexes(table)
+            constraints = generated_constraints(table)
+            table.indexes.difference_update(indexes)
+            table.constraints.difference_update(constraints)
+            detached.append((table, indexes, constraints))
+        try:
+            yield
+        finally:
+            for table, indexes, constraints in detached:
+                table.indexes.update(indexes)
+                table.constraints.update(constraints)
+
+
+def create_tables(metadata, bind, checkfirst=True):
+    """
+    Create all tables of given metadata without the indexes and constraints
+    generated by ModelConfigurator.
+
+    :param metadata: configured MetaData
+    :param bind: Engine or Connection
+    :param checkfirst: whether or not to skip existing tables
+    """
+    with connect(bind) as connection:
+        with detached_generated_objects(metadata):
+            metadata.create_all(connection, checkfirst=checkfirst)
+
+
+@contextmanager
+def begin(connection):
+    """
+    Begin a transaction on given connection unless one is already in
+    progress, in which case its owner commits it.
+    """
+    if connection.in_transaction():
+        yield
+    else:
+        with connection.begin():
+            yield
+
+
+@contextmanager
+def sqlite_rebuild(bind):
+    """
+    Yield a connection for rebuilding SQLite tables following SQLite's table
+    rebuild procedure.
+
+    If foreign key enforcement is on, it is turned off before the rebuild
+    transaction starts, so that dropping the original tables doesn't cascade
+    to or fail on referencing rows. Foreign keys are checked with ``PRAGMA
+    foreign_key_check`` before the transaction is committed and enforcement
+    is turned back on afterwards.
+
+    :raises ValueError:
+        if foreign key enforcement can't be turned off because given
+        connection is already in a transaction, or if the rebuilt tables
+        violate foreign keys
+    """
+    if isinstance(bind, sa.engine.Engine):
+        with bind.connect() as connection:
+            with sqlite_rebuild(connection) as connection:
+                yield connection
+        return
+    connection = bind
+    if not connection.exec_driver_sql('PRAGMA foreign_keys').scalar():
+        with begin(connection):
+            yield connection
+        return
+    # The pragma is a no-op inside a transaction.
+    connection.exec_driver_sql('PRAGMA foreign_keys = OFF')
+    try:
+        if connection.exec_driver_sql('PRAGMA foreign_keys').scalar():
+            raise ValueError(
+                'Foreign key enforcement can not be turned off for '
+                'rebuilding SQLite tables inside a transaction.'
+            )
+        if connection.in_transaction():
+            transaction = connection.get_transaction()
+        else:
+            transaction = connection.begin()
+        try:
+            yield connection
+            violations = connection.exec_driver_sql(
+                'PRAGMA foreign_key_check'
+            ).fetchall()
+            if violations:
+                raise ValueError(
+                    'Rebuilt tables violate foreign keys: %r' % (violations, )
+                )
+        except Exception:
+            transaction.rollback()
+            raise
+        transaction.commit()
+    finally:
+        connection.exec_driver_sql('PRAGMA foreign_keys = ON')
+
+
+def rebuild_sqlite_table(connection, table):
+    """
+    Rebuild given table on SQLite, which doesn't support adding constraints
+    to existing tables. A new table is created with the full definition, rows
+    are copied over, the old table is dropped and the new one renamed. All
+    indexes of the table are recreated afterwards.
+
+    Must be run on a connection from :func:`sqlite_rebuild`.
+    """
+    # The copy is made into the same MetaData so that its foreign keys can be
+    # resolved.
+    temporary = table.to_metadata(
+        table.metadata,
+        name='%s__sqlalchemy_defaults_rebuild' % table.name
+    )
+    try:
+        connection.execute(CreateTable(temporary))
+    finally:
+        table.metadata.remove(temporary)
+    preparer = connection.dialect.identifier_preparer
+    columns = ', '.join(
+        preparer.quote(column.name) for column in table.columns
+    )
+    connection.exec_driver_sql(
+        'INSERT INTO %s (%s) SELECT %s FROM %s' % (
+            preparer.format_table(temporary),
+            columns,
+            columns,
+            preparer.format_table(table)
+        )
+    )
+    connection.exec_driver_sql('DROP TABLE %s' % preparer.format_table(table))
+    connection.exec_driver_sql(
+        'ALTER TABLE %s RENAME TO %s' % (
+            preparer.format_table(temporary),
+            preparer.quote(table.name)
+        )
+    )
+    for index in table.indexes:
+        connection.execute(CreateIndex(index))
+
+
+def create_post_load(metadata, bind):
+    """
+    Create the indexes and constraints generated by ModelConfigurator for
+    tables created with :func:`create_tables`.
+
+    On SQLite tables with generated constraints are rebuilt, since SQLite
+    doesn't support adding constraints to existing tables. Foreign key
+    enforcement is turned off during the rebuild (see :func:`sqlite_rebuild`),
+    so given connection must not be in a transaction if it is on.
+
+    :param metadata: configured MetaData
+    :param bind: Engine or Connection
+    """
+    if bind.dialect.name == 'sqlite':
+        connection_context = sqlite_rebuild(bind)
+    else:
+        connection_context = connect(bind)
+    with connection_context as connection:
+        for table in metadata.sorted_tables:
+            constraints = generated_constraints(table)
+            if constraints and connection.dialect.name == 'sqlite':
+                rebuild_sqlite_table(connection, table)
+                continue
+            for constraint in constraints:
+                connection.execute(AddConstraint(constraint))
+            for index in generated_indexes(table):
+                connection.execute(CreateIndex(index))
+
+
+def table_fingerprint(table):
+    """
+    Return a stable representation of everything in given table that affects
+    its DDL.
+    """
+    columns = [
+        (
+            column.key,
+            column.name,
+            repr(column.type),
+            column.nullable,
+            column.primary_key,
+            stable_repr(column.autoincrement),
+            default_signature(column.server_default),
+            column.comment,
+        )
+        for column in table.columns
+    ]
+    constraints = sorted(
+        (
+            constraint.__class__.__name__,
+            stable_repr(constraint.name),
+            [column.name for column in getattr(constraint, 'columns', ())],
+            stable_repr(getattr(constraint, 'sqltext', None)),
+            sorted(
+                (
+                    element.target_fullname,
+                    element.ondelete,
+                    element.onupdate
+                )
+                for element in getattr(constraint, 'elements', ())
+            ),
+            stable_repr(dict(constraint.dialect_kwargs)),
+        )
+        for constraint in table.constraints
+    )
+    indexes = sorted(
+        (
+            stable_repr(index.name),
+            [stable_repr(expression) for expression in index.expressions],
+            index.unique,
+            stable_repr(dict(index.dialect_kwargs)),
+        )
+        for index in table.indexes
+    )
+    return stable_repr([
+        table.fullname,
+        table.comment,
+        stable_repr(dict(table.dialect_kwargs)),
+        columns,
+        constraints,
+        indexes,
+    ])
+
+
+def table_state(table):
+    """
+    Return a cheap token identifying the objects given table consists of.
+    The token changes whenever a column, type, server default, constraint or
+    index is added, removed or replaced.
+    """
+    return (
+        tuple(
+            (
+                id(column),
+                id(column.type),
+                id(column.server_default),
+                column.nullable
+            )
+            for column in table.columns
+        ),
+        frozenset(id(constraint) for constraint in table.constraints),
+        frozenset(id(index) for index in table.indexes),
+    )
+
+
+def cached_table_fingerprint(table):
+    """
+    Return the fingerprint hash of given table. The hash is recomputed only
+    when the state of the table (see :func:`table_state`) has changed.
+    """
+    state = table_state(table)
+    cached = _table_fingerprints.get(table)
+    if cached is None or cached[0] != state:
+        cached = (
+            state,
+            hashlib.sha1(table_fingerprint(table).encode('utf-8')).digest()
+        )
+        _table_fingerprints[table] = cached
+    return cached[1]
+
+
+def metadata_fingerprint(metadata):
+    """
+    Return a fingerprint hash of the DDL relevant parts of all tables of
+    given metadata.
+    """
+    fingerprint = hashlib.sha1()
+    for table in metadata.sorted_tables:
+        fingerprint.update(cached_table_fingerprint(table))
+    return fingerprint.hexdigest()
+
+
+def dialect_key(dialect):
+    """
+    Return a key for given dialect. The server version is included, since
+    some dialects compile differently depending on it.
+    """
+    version = getattr(dialect, 'server_version_info', None)
+    return '%s+%s%s' % (
+        dialect.name,
+        dialect.driver,
+        '-' + '.'.join(str(part) for part in version) if version else ''
+    )
+
+
+def emit_create_all(metadata, dialect, emit):
+    """
+    Compile the DDL statements ``metadata.create_all`` would emit for given
+    dialect on an empty database and call given function with each statement
+    as soon as it has been compiled.
+    """
+    def execute(sql, *multiparams, **params):
+        emit(six.text_type(sql.compile(dialect=dialect)).strip())
+
+    metadata.create_all(MockConnection(dialect, execute), checkfirst=False)
+
+
+def compile_create_all(metadata, dialect):
+    """
+    Return a list of DDL statements ``metadata.create_all`` would emit for
+    given dialect on an empty database.
+    """
+    statements = []
+    emit_create_all(metadata, dialect, statements.append)
+    return statements
+
+
+class DDLCache(object):
+    """
+    Cache of compiled ``create_all`` DDL statements keyed by dialect and
+    metadata fingerprint.
+
+    Statements are replayed as is, so Python side effects of DDL event
+    listeners are not repeated and the target database must not contain any
+    of the tables.
+
+    :param directory:
+        Optional directory for persisting the compiled statements across
+        processes. Created if it doesn't exist.
+    """
+    def __init__(self, directory=None):
+        self.directory = directory
+        self.statements = {}
+        self._lock = threading.Lock()
+
+    def key(self, metadata, dialect):
+        return '%s-%s' % (dialect_key(dialect), metadata_fingerprint(metadata))
+
+    def path(self, key):
+        return os.path.join(self.directory, key + '.json')
+
+    def load(self, key):
+        if self.directory is None:
+            return None
+        try:
+            with open(self.path(key)) as f:
+                return json.load(f)
+        except (IOError, OSError, ValueError):
+            return None
+
+    def save(self, key, statements):
+        if not os.path.isdir(self.directory):
+            try:
+                os.makedirs(self.directory)
+            except OSError:
+                if not os.path.isdir(self.directory):
+                    raise
+        fd, temporary = tempfile.mkstemp(dir=self.directory, suffix='.tmp')
+        with os.fdopen(fd, 'w') as f:
+            json.dump(statements, f)
+        getattr(os, 'replace', os.rename)(temporary, self.path(key))
+
+    def get(self, metadata, dialect):
+        """
+        Return the compiled DDL statements of given metadata for given
+        dialect, compiling them if they are not cached yet.
+        """
+        key = self.key(metadata, dialect)
+        with self._lock:
+            statements = self.statements.get(key)
+        if statements is None:
+            statements = self.load(key)
+            if statements is None:
+                statements = compile_create_all(metadata, dialect)
+                if self.directory is not None:
+                    self.save(key, statements)
+            with self._lock:
+                self.statements[key] = statements
+        return statements
+
+    def create_all(self, metadata, bind):
+        """
+        Create all tables of given metadata by executing the cached DDL.
+
+        :param metadata: configured MetaData
+        :param bind: Engine or Connection
+        """
+        with connect(bind) as connection:
+            for statement in self.get(metadata, connection.dialect):
+                connection.exec_driver_sql(statement)
@@ -0,0 +1,501 @@
+# -*- coding: utf-8 -*-
+"""
+Schema drift checking.
+
+:func:`check_drift` compares a live database with a configured MetaData and
+reports server defaults, min/max check constraints, foreign key indexes and
+enum types which are missing from the database, differ from it or exist only
+in the database::
+
+
+    from sqlalchemy_defaults.drift import check_drift
+
+
+    for drift in check_drift(Base.metadata, engine):
+        print(drift)
+
+
+Reflection is batched: with SQLAlchemy 2.0+ the inspector's ``get_multi_*``
+methods fetch each kind of object for a whole schema in a single query. On
+older versions SQLite and PostgreSQL are read with one catalog query per kind
+and schema, other databases fall back to per table reflection.
+"""
+import re
+from collections import namedtuple
+
+import six
+import sqlalchemy as sa
+
+from sqlalchemy_defaults import is_generated, resolve_type
+from sqlalchemy_defaults.ddl import connect
+
+
+class Drift(namedtuple(
+    'Drift',
+    ['table', 'kind', 'name', 'problem', 'expected', 'actual']
+)):
+    """
+    Single difference between the MetaData and the database.
+
+    :param table: full name of the table or schema name for enums
+    :param kind:
+        ``'table'``, ``'server_default'``, ``'check'``, ``'index'`` or
+        ``'enum'``
+    :param name: column, constraint, index or enum name
+    :param problem: ``'missing'``, ``'extra'`` or ``'changed'``
+    :param expected: value in the MetaData
+    :param actual: value in the database
+    """
+    __slots__ = ()
+
+    def __str__(self):
+        message = '%s %s %s: %s' % (
+            self.table,
+            self.kind,
+            self.name,
+            self.problem
+        )
+        if self.problem == 'changed':
+            message += ' (expected %r, got %r)' % (self.expected, self.actual)
+        return message
+
+
+def normalize_sql(sql):
+    """
+    Normalize given SQL expression for comparison. Whitespace, identifier
+    quotes, type casts and redundant parentheses are removed and the result
+    is lower cased.
+    """
+    if sql is None:
+        return None
+    sql = re.sub(r'::[\w ]+(\[\])?', '', str(sql))
+    sql = re.sub(r'[\s"`\[\]]', '', sql).lower()
+    while sql.startswith('(') and sql.endswith(')') and balanced(sql[1:-1]):
+        sql = sql[1:-1]
+    return sql
+
+
+def balanced(sql):
+    depth = 0
+    for char in sql:
+        if char == '(':
+            depth += 1
+        elif char == ')':
+            depth -= 1
+            if depth < 0:
+                return False
+    return depth == 0
+
+
+def group_rows(rows, entry):
+    """
+    Group given ``(table_name, ...)`` catalog rows into a dict of lists keyed
+    by table name, converting each row with given entry function.
+    """
+    grouped = {}
+    for row in rows:
+        grouped.setdefault(row[0], []).append(entry(*row[1:]))
+    return grouped
+
+
+def group_index_rows(rows):
+    """
+    Group given ``(table_name, index_name, unique, column_name,
+    constraint_name)`` catalog rows, one row per indexed column in column
+    order, into reflected indexes keyed by table name.
+    """
+    grouped = {}
+    indexes = {}
+    for table_name, name, unique, column_name, constraint in rows:
+        if (table_name, name) not in indexes:
+            index = {'name': name, 'unique': bool(unique), 'column_names': []}
+            if constraint is not None:
+                index['duplicates_constraint'] = constraint
+            indexes[(table_name, name)] = index
+            grouped.setdefault(table_name, []).append(index)
+        indexes[(table_name, name)]['column_names'].append(column_name)
+    return grouped
+
+
+def sqlite_master(connection, schema):
+    return '%s.sqlite_master' % (
+        connection.dialect.identifier_preparer.quote_identifier(
+            schema or 'main'
+        )
+    )
+
+
+def sqlite_columns(connection, schema):
+    rows = connection.execute(sa.text(
+        'SELECT m.name, p.name, p.dflt_value '
+        'FROM %s AS m, pragma_table_info(m.name, :schema) AS p '
+        "WHERE m.type = 'table' "
+        'ORDER BY m.name, p.cid' % sqlite_master(connection, schema)
+    ), {'schema': schema or 'main'})
+    return group_rows(
+        rows,
+        lambda name, default: {
+            'name': name,
+            'default': None if default is None else six.text_type(default)
+        }
+    )
+
+
+def sqlite_check_constraints(connection, schema):
+    rows = connection.execute(sa.text(
+        "SELECT name, sql FROM %s WHERE type = 'table'" %
+        sqlite_master(connection, schema)
+    ))
+    # Same parsing as SQLAlchemy's SQLite dialect uses for a single table.
+    pattern = re.compile(
+        r'(?:CONSTRAINT (.+) +)?CHECK *\( *(.+) *\),? *', re.I
+    )
+    grouped = {}
+    for table_name, sql in rows:
+        constraints = grouped.setdefault(table_name, [])
+        for match in pattern.finditer(sql or ''):
+            name = match.group(1)
+            if name:
+                name = re.sub(r'^"|"$', '', name)
+            constraints.append({'name': name, 'sqltext': match.group(2)})
+    return grouped
+
+
+def sqlite_indexes(connection, schema):
+    rows = connection.execute(sa.text(
+        'SELECT m.name, il.name, il."unique", ii.name, NULL '
+        'FROM %s AS m, '
+        'pragma_index_list(m.name, :schema) AS il, '
+        'pragma_index_info(il.name, :schema) AS ii '
+        "WHERE m.type = 'table' AND il.name NOT LIKE 'sqlite_autoindex%%' "
+        'ORDER BY m.name, il.seq, ii.seqno' % sqlite_master(connection, schema)
+    ), {'schema': schema or 'main'})
+    return group_index_rows(rows)
+
+
+POSTGRESQL_TABLES = (
+    'JOIN pg_catalog.pg_namespace n ON n.oid = c.relnamespace '
+    'WHERE n.nspname = coalesce(:schema, current_schema()) '
+    "AND c.relkind IN ('r', 'p') "
+)
+
+
+def postgresql_columns(connection, schema):
+    rows = connection.execute(sa.text(
+        'SELECT c.relname, a.attname, '
+        'pg_catalog.pg_get_expr(d.adbin, d.adrelid) '
+        'FROM pg_catalog.pg_attribute a '
+        'JOIN pg_catalog.pg_class c ON c.oid = a.attrelid '
+        'LEFT JOIN pg_catalog.pg_attrdef d '
+        'ON d.adrelid = a.attrelid AND d.adnum = a.attnum ' +
+        POSTGRESQL_TABLES +
+        'AND a.attnum > 0 AND NOT a.attisdropped '
+        'ORDER BY c.relname, a.attnum'
+    ), {'schema': schema})
+    return group_rows(
+        rows,
+        lambda name, default: {'name': name, 'default': default}
+    )
+
+
+def postgresql_check_constraints(connection, schema):
+    rows = connection.execute(sa.text(
+        'SELECT c.relname, con.conname, '
+        'pg_catalog.pg_get_constraintdef(con.oid) '
+        'FROM pg_catalog.pg_constraint con '
+        'JOIN pg_catalog.pg_class c ON c.oid = con.conrelid ' +
+        POSTGRESQL_TABLES +
+        "AND con.contype = 'c'"
+    ), {'schema': schema})
+
+    def entry(name, definition):
+        # Same parsing as SQLAlchemy's PostgreSQL dialect uses for a single
+        # table: strip ``CHECK (...)`` and a trailing ``NOT VALID``.
+        match = re.match(
+            r'^CHECK *\((.+)\)( NOT VALID)?$', definition, flags=re.DOTALL
+        )
+        sqltext = match.group(1) if match else definition
+        return {
+            'name': name,
+            'sqltext': re.sub(
+                r'^\s*\((.+)\)\s*$', r'\1', sqltext, flags=re.DOTALL
+            )
+        }
+
+    return group_rows(rows, entry)
+
+
+def postgresql_indexes(connection, schema):
+    rows = connection.execute(sa.text(
+        'SELECT c.relname, i.relname, ix.indisunique, a.attname, '
+        'con.conname '
+        'FROM pg_catalog.pg_index ix '
+        'JOIN pg_catalog.pg_class c ON c.oid = ix.indrelid '
+        'JOIN pg_catalog.pg_class i ON i.oid = ix.indexrelid '
+        'CROSS JOIN LATERAL unnest(ix.indkey::int2[]) '
+        'WITH ORDINALITY AS k(attnum, ord) '
+        'LEFT JOIN pg_catalog.pg_attribute a '
+        'ON a.attrelid = c.oid AND a.attnum = k.attnum '
+        'LEFT JOIN pg_catalog.pg_constraint con '
+        "ON con.conindid = ix.indexrelid AND con.contype = 'u' " +
+        POSTGRESQL_TABLES +
+        'AND NOT ix.indisprimary '
+        'ORDER BY c.relname, i.relname, k.ord'
+    ), {'schema': schema})
+    return group_index_rows(rows)
+
+
+#: Readers returning a whole schema's reflected objects of one kind in a
+#: single catalog query, by dialect name and kind. Used when the inspector
+#: has no ``get_multi_*`` methods.
+CATALOG_READERS = {
+    'sqlite': {
+        'columns': sqlite_columns,
+        'check_constraints': sqlite_check_constraints,
+        'indexes': sqlite_indexes,
+    },
+    'postgresql': {
+        'columns': postgresql_columns,
+        'check_constraints': postgresql_check_constraints,
+        'indexes': postgresql_indexes,
+    },
+}
+
+
+def reflect(inspector, kind, schema, table_names):
+    """
+    Return a dict of given kind of reflected objects (eg. ``'columns'`` or
+    ``'indexes'``) keyed by table name. Uses a single batched query where
+    the inspector or :data:`CATALOG_READERS` support it.
+    """
+    get_multi = getattr(inspector, 'get_multi_' + kind, None)
+    if get_multi is not None:
+        return dict(
+            (key[1], value) for key, value in get_multi(
+                schema=schema,
+                filter_names=table_names
+            ).items()
+        )
+    reader = CATALOG_READERS.get(inspector.dialect.name, {}).get(kind)
+    if reader is not None:
+        reflected = reader(inspector.bind, schema)
+        return dict(
+            (name, reflected.get(name, [])) for name in table_names
+        )
+    get = getattr(inspector, 'get_' + kind)
+    return dict(
+        (name, get(name, schema=schema)) for name in table_names
+    )
+
+
+def expected_server_default(column, ddl_compiler):
+    if column.server_default is None:
+        return None
+    return ddl_compiler.get_column_default_string(column)
+
+
+def compile_check(constraint, ddl_compiler):
+    return ddl_compiler.sql_compiler.process(
+        constraint.sqltext,
+        include_table=False,
+        literal_binds=True
+    )
+
+
+def check_server_defaults(table, columns, ddl_compiler):
+    reflected = dict((column['name'], column) for column in columns)
+    for column in table.columns:
+        if column.name not in reflected:
+            continue
+        expected = expected_server_default(column, ddl_compiler)
+        actual = reflected[column.name].get('default')
+        if normalize_sql(expected) == normalize_sql(actual):
+            continue
+        if expected is None:
+            problem = 'extra'
+        elif actual is None:
+            problem = 'missing'
+        else:
+            problem = 'changed'
+        yield Drift(
+            table.fullname,
+            'server_default',
+            column.name,
+            problem,
+            expected,
+            actual
+        )
+
+
+def check_check_constraints(table, constraints, ddl_compiler):
+    expected = [
+        constraint for constraint in table.constraints
+        if isinstance(constraint, sa.CheckConstraint)
+    ]
+    unmatched = list(constraints)
+
+    def match(constraint):
+        text = normalize_sql(compile_check(constraint, ddl_compiler))
+        for reflected in unmatched:
+            if (
+                constraint.name is not None and
+                reflected.get('name') == constraint.name
+            ) or normalize_sql(reflected['sqltext']) == text:
+                unmatched.remove(reflected)
+                return True
+        return False
+
+    for constraint in expected:
+        if not match(constraint) and is_generated(constraint):
+            yield Drift(
+                table.fullname,
+                'check',
+                constraint.name or compile_check(constraint, ddl_compiler),
+                'missing',
+                compile_check(constraint, ddl_compiler),
+                None
+            )
+    for reflected in unmatched:
+        yield Drift(
+            table.fullname,
+            'check',
+            reflected.get('name') or reflected['sqltext'],
+            'extra',
+            None,
+            reflected['sqltext']
+        )
+
+
+def index_columns(index):
+    return tuple(column.name for column in index.columns)
+
+
+def check_indexes(table, indexes):
+    reflected = [
+        index for index in indexes
+        if not index.get('duplicates_constraint')
+    ]
+    reflected_columns = set(
+        tuple(index['column_names']) for index in reflected
+    )
+    for index in table.indexes:
+        if (
+            is_generated(index) and
+            index_columns(index) not in reflected_columns
+        ):
+            yield Drift(
+                table.fullname,
+                'index',
+                index.name or ', '.join(index_columns(index)),
+                'missing',
+                index_columns(index),
+                None
+            )
+    names = set(index.name for index in table.indexes)
+    columns = set(index_columns(index) for index in table.indexes)
+    for index in reflected:
+        if (
+            index['name'] not in names and
+            tuple(index['column_names']) not in columns
+        ):
+            yield Drift(
+                table.fullname,
+                'index',
+                index['name'],
+                'extra',
+                None,
+                tuple(index['column_names'])
+            )
+
+
+def check_enums(tables, enums, schema):
+    expected = {}
+    for table in tables:
+        for column in table.columns:
+            type_ = resolve_type(column.type)
+            if (
+                isinstance(type_, sa.Enum) and
+                type_.native_enum and
+                type_.name is not None
+            ):
+                expected[type_.name] = list(type_.enums)
+    reflected = dict((enum['name'], enum['labels']) for enum in enums)
+    for name, labels in sorted(expected.items()):
+        if name not in reflected:
+            yield Drift(schema, 'enum', name, 'missing', labels, None)
+        elif reflected[name] != labels:
+            yield Drift(
+                schema,
+                'enum',
+                name,
+                'changed',
+                labels,
+                reflected[name]
+            )
+    for name, labels in sorted(reflected.items()):
+        if name not in expected:
+            yield Drift(schema, 'enum', name, 'extra', None, labels)
+
+
+def check_schema(inspector, tables, schema):
+    dialect = inspector.dialect
+    ddl_compiler = dialect.ddl_compiler(dialect, None)
+    existing = set(inspector.get_table_names(schema=schema))
+    present = []
+    for table in tables:
+        if table.name in existing:
+            present.append(table)
+        else:
+            yield Drift(
+                table.fullname,
+                'table',
+                table.name,
+                'missing',
+                None,
+                None
+            )
+    names = [table.name for table in present]
+    columns = reflect(inspector, 'columns', schema, names)
+    checks = reflect(inspector, 'check_constraints', schema, names)
+    indexes = reflect(inspector, 'indexes', schema, names)
+    for table in present:
+        for drift in check_server_defaults(
+            table, columns[table.name], ddl_compiler
+        ):
+            yield drift
+        for drift in check_check_constraints(
+            table, checks[table.name], ddl_compiler
+        ):
+            yield drift
+        for drift in check_indexes(table, indexes[table.name]):
+            yield drift
+    if dialect.supports_native_enum and hasattr(inspector, 'get_enums'):
+        for drift in check_enums(
+            present, inspector.get_enums(schema=schema), schema
+        ):
+            yield drift
+
+
+def check_drift(metadata, bind):
+    """
+    Compare given configured MetaData with the database behind given bind.
+
+    Checked are the server defaults of all columns, the check constraints
+    and indexes generated by ModelConfigurator (missing) or unknown to the
+    MetaData (extra), and on databases with native enums the enum types.
+
+    :param metadata: configured MetaData
+    :param bind: Engine or Connection
+    :return: list of :class:`Drift` objects
+    """
+    schemas = {}
+    for table in metadata.tables.values():
+        schemas.setdefault(table.schema, []).append(table)
+    drifts = []
+    with connect(bind) as connection:
+        inspector = sa.inspect(connection)
+        for schema, tables in sorted(
+            schemas.items(), key=lambda item: item[0] or ''
+        ):
+            drifts.extend(check_schema(inspector, tables, schema))
+    return drifts
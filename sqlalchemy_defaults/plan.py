@@ -0,0 +1,254 @@
+# -*- coding: utf-8 -*-
+"""
+Export and replay of configuration plans.
+
+A configuration plan records every operation ModelConfigurator applies to each
+table (server defaults, indexes, check constraints, enum names etc.). The plan
+can be exported at build time and replayed at process start, which is much
+cheaper than configuring all tables again::
+
+
+    # At build time
+    from sqlalchemy_defaults.plan import dump_plan, export_plan
+
+    dump_plan(export_plan(Base), 'configuration_plan.json')
+
+
+    # At startup
+    from sqlalchemy_defaults.plan import load_plan, replay_plan
+
+    replay_plan(Base, load_plan('configuration_plan.json'))
+
+
+Each table entry carries a signature hash of the unconfigured table, its
+columns and resolved options. Tables whose signature doesn't match the plan
+are configured normally.
+"""
+import hashlib
+import json
+import os
+import pickle
+import tempfile
+
+import six
+import sqlalchemy as sa
+
+import sqlalchemy_defaults
+from sqlalchemy_defaults import (
+    ConfigurationManager,
+    get_tables,
+    is_configured,
+    is_generated,
+    ModelConfigurator
+)
+
+#: Version of the plan format
+PLAN_VERSION = 1
+
+
+def stable_repr(value):
+    """
+    Return a representation of given value which is stable across
+    processes. Callables are represented by their qualified names instead of
+    their memory addresses and SQL expressions by their SQL and bound
+    values.
+    """
+    if isinstance(value, dict):
+        return '{%s}' % ', '.join(
+            '%s: %s' % (stable_repr(key), stable_repr(value[key]))
+            for key in sorted(value, key=repr)
+        )
+    if isinstance(value, (list, tuple)):
+        return '[%s]' % ', '.join(stable_repr(item) for item in value)
+    if isinstance(value, sa.sql.ClauseElement):
+        # Bound values (eg. the bounds of min/max checks) are not part of the
+        # SQL string.
+        compiled = value.compile()
+        return '%r %s' % (
+            six.text_type(compiled),
+            stable_repr(compiled.params)
+        )
+    if isinstance(value, (set, frozenset)):
+        return '{%s}' % ', '.join(sorted(stable_repr(item) for item in value))
+    if callable(value) and not isinstance(value, type):
+        return '<%s.%s>' % (
+            getattr(value, '__module__', None),
+            getattr(
+                value,
+                '__qualname__',
+                getattr(value, '__name__', value.__class__.__name__)
+            )
+        )
+    return repr(value)
+
+
+def default_signature(default):
+    if default is None:
+        return None
+    if getattr(default, 'is_sequence', False):
+        return ('sequence', default.name)
+    arg = getattr(default, 'arg', None)
+    if isinstance(arg, sa.sql.ClauseElement):
+        return ('sql', stable_repr(arg))
+    if callable(arg):
+        return ('callable', )
+    return ('scalar', stable_repr(arg))
+
+
+def table_signature(table, model=None, manager=None):
+    """
+    Return a signature hash of given unconfigured table. The signature
+    covers the columns, their types, info and defaults, the existing
+    constraints and indexes and the resolved configuration options.
+    """
+    if manager is None:
+        manager = ConfigurationManager()
+    configurator = ModelConfigurator(manager, model, table=table)
+    parts = [
+        table.fullname,
+        stable_repr(configurator.options._values),
+        stable_repr(dict(
+            (key, options._values)
+            for key, options in configurator.column_options.items()
+        )),
+    ]
+    for column in table.columns:
+        parts.append((
+            column.key,
+            column.name,
+            repr(column.type),
+            column.nullable,
+            column.primary_key,
+            stable_repr(column.info),
+            default_signature(column.default),
+            default_signature(column.server_default),
+            sorted(fk.target_fullname for fk in column.foreign_keys),
+        ))
+    parts.extend(sorted(
+        (
+            constraint.__class__.__name__,
+            stable_repr(constraint.name),
+            sorted(column.key for column in constraint.columns),
+        )
+        for constraint in table.constraints
+        if not is_generated(constraint)
+    ))
+    parts.extend(sorted(
+        (
+            'Index',
+            stable_repr(index.name),
+            [column.key for column in index.columns],
+            index.unique,
+        )
+        for index in table.indexes
+        if not is_generated(index)
+    ))
+    return hashlib.sha1(
+        stable_repr(parts).encode('utf-8')
+    ).hexdigest()
+
+
+def export_plan(target, manager=None):
+    """
+    Configure all tables of given MetaData, registry or declarative base and
+    return the configuration plan.
+
+    :raises ValueError: if any of the tables has already been configured
+    :return: plan dict
+    """
+    if manager is None:
+        manager = ConfigurationManager()
+    plans = {}
+
+    def record(configurator):
+        plans[configurator.table] = [
+            [option, operation, list(args)]
+            for option, operation, args in configurator.plan
+        ]
+
+    tables = {}
+    manager.listeners.append(record)
+    try:
+        for table, model in get_tables(target):
+            if is_configured(table):
+                raise ValueError(
+                    'Table %r has already been configured.' % table.fullname
+                )
+            signature = table_signature(table, model, manager)
+            manager.configure_table(table, model)
+            tables[table.fullname] = {
+                'signature': signature,
+                'operations': plans[table],
+            }
+    finally:
+        manager.listeners.remove(record)
+    return {
+        'version': PLAN_VERSION,
+        'sqlalchemy_defaults': sqlalchemy_defaults.__version__,
+        'tables': tables,
+    }
+
+
+def replay_plan(target, plan, manager=None):
+    """
+    Apply given plan to all tables of given MetaData, registry or
+    declarative base. Tables missing from the plan or whose signature
+    doesn't match are configured normally, as are all tables if the plan
+    version doesn't match.
+
+    :return: list of tables which were configured normally
+    """
+    if manager is None:
+        manager = ConfigurationManager()
+    tables = plan.get('tables', {}) if (
+        plan.get('version') == PLAN_VERSION
+    ) else {}
+    fallback = []
+    for table, model in get_tables(target):
+        if is_configured(table):
+            continue
+        entry = tables.get(table.fullname)
+        if (
+            entry is not None and
+            entry['signature'] == table_signature(table, model, manager)
+        ):
+            manager.replay_table(table, entry['operations'])
+        else:
+            fallback.append(table)
+            manager.configure_table(table, model)
+    return fallback
+
+
+def dump_plan(plan, path):
+    """
+    Write given plan to given path. Paths ending with ``.json`` are written
+    as JSON, others are pickled. The plan is written to a temporary file
+    which is renamed into place, so a failed write never leaves a partial
+    plan behind.
+    """
+    fd, temporary = tempfile.mkstemp(
+        dir=os.path.dirname(os.path.abspath(path)),
+        suffix='.tmp'
+    )
+    try:
+        if path.endswith('.json'):
+            with os.fdopen(fd, 'w') as f:
+                json.dump(plan, f, sort_keys=True)
+        else:
+            with os.fdopen(fd, 'wb') as f:
+                pickle.dump(plan, f, pickle.HIGHEST_PROTOCOL)
+        getattr(os, 'replace', os.rename)(temporary, path)
+    except Exception:
+        os.remove(temporary)
+        raise
+
+
+def load_plan(path):
+    """
+    Read a plan written with :func:`dump_plan` from given path.
+    """
+    if path.endswith('.json'):
+        with open(path) as f:
+            return json.load(f)
+    with open(path, 'rb') as f:
+        return pickle.load(f)
@@ -0,0 +1,171 @@
+# -*- coding: utf-8 -*-
+"""
+Opt-in instrumentation of table configuration.
+
+A :class:`ConfigurationStats` collector attached to a ConfigurationManager
+measures how long each table and column takes to configure and counts the
+constraints, indexes, defaults and enum names each option generates::
+
+
+    from sqlalchemy_defaults import ConfigurationManager, configure_metadata
+    from sqlalchemy_defaults.stats import ConfigurationStats
+
+
+    manager = ConfigurationManager()
+    manager.stats = ConfigurationStats()
+    configure_metadata(Base, manager)
+
+    manager.stats.slowest(5)
+    manager.stats.report()
+
+
+Each measured table is also logged on DEBUG level to the
+``sqlalchemy_defaults.stats`` logger and passed to the callables in
+``ConfigurationStats.listeners``.
+"""
+import logging
+import time
+from collections import OrderedDict
+
+logger = logging.getLogger(__name__)
+
+timer = getattr(time, 'perf_counter', time.time)
+
+#: Category of objects each configuration operation produces
+OPERATION_CATEGORIES = {
+    'check': 'constraints',
+    'index': 'indexes',
+    'default': 'defaults',
+    'callable_default': 'defaults',
+    'server_default': 'server_defaults',
+    'sql_server_default': 'server_defaults',
+    'enum_name': 'enum_names',
+    'choice_codes': 'choice_codes',
+}
+
+
+def count_operations(plan, counts=None):
+    """
+    Count given plan entries by option and object category.
+
+    :param plan: list of (option, operation, args) tuples
+    :param counts: optional dict of counts to add to
+    :return: dict of dicts, eg. ``{'index_foreign_keys': {'indexes': 2}}``
+    """
+    if counts is None:
+        counts = {}
+    for option, operation, args in plan:
+        option_counts = counts.setdefault(option, {})
+        category = OPERATION_CATEGORIES.get(operation, operation)
+        option_counts[category] = option_counts.get(category, 0) + 1
+    return counts
+
+
+class TableStats(object):
+    """
+    Configuration statistics of a single table.
+    """
+    def __init__(self, table, model):
+        self.table = table
+        self.model = model
+        #: Total configuration time in seconds
+        self.seconds = 0.0
+        #: Configuration time of each column in seconds keyed by column key
+        self.column_seconds = OrderedDict()
+        #: Generated objects by option and category
+        self.counts = {}
+
+    def __repr__(self):
+        return '<TableStats %s %.2f ms>' % (
+            self.table.fullname,
+            self.seconds * 1000
+        )
+
+    def as_dict(self):
+        return {
+            'table': self.table.fullname,
+            'model': None if self.model is None else self.model.__name__,
+            'seconds': self.seconds,
+            'columns': dict(self.column_seconds),
+            'counts': self.counts,
+        }
+
+
+class ConfigurationStats(object):
+    """
+    Collector of configuration statistics. Attach an instance to
+    ``ConfigurationManager.stats`` to enable it.
+    """
+    def __init__(self):
+        #: List of measured :class:`TableStats` in configuration order
+        self.tables = []
+        #: Callables called with each measured :class:`TableStats`
+        self.listeners = []
+
+    def measure(self, configurator):
+        """
+        Run given ModelConfigurator and record its statistics.
+        """
+        stats = TableStats(configurator.table, configurator.model)
+        configure_column = configurator.configure_column
+
+        def timed_configure_column(column, table_checks):
+            start = timer()
+            configure_column(column, table_checks)
+            stats.column_seconds[column.key] = timer() - start
+
+        configurator.configure_column = timed_configure_column
+        start = timer()
+        try:
+            configurator()
+        finally:
+            del configurator.configure_column
+        stats.seconds = timer() - start
+        count_operations(configurator.plan, stats.counts)
+        self.tables.append(stats)
+
+        logger.debug(
+            'Configured table %s in %.2f ms: %s',
+            stats.table.fullname,
+            stats.seconds * 1000,
+            stats.counts
+        )
+        for listener in self.listeners:
+            listener(stats)
+        return stats
+
+    @property
+    def seconds(self):
+        return sum(stats.seconds for stats in self.tables)
+
+    def counts(self):
+        """
+        Return total counts of generated objects by option and category.
+        """
+        counts = {}
+        for stats in self.tables:
+            for option, option_counts in stats.counts.items():
+                totals = counts.setdefault(option, {})
+                for category, count in option_counts.items():
+                    totals[category] = totals.get(category, 0) + count
+        return counts
+
+    def slowest(self, count=10):
+        """
+        Return given number of slowest to configure tables.
+        """
+        return sorted(
+            self.tables,
+            key=lambda stats: stats.seconds,
+            reverse=True
+        )[:count]
+
+    def report(self):
+        """
+        Return a JSON serializable report of all measured tables.
+        """
+        return {
+            'seconds': self.seconds,
+            'counts': self.counts(),
+            'tables': [stats.as_dict() for stats in self.tables],
+        }
@@ -0,0 +1,98 @@
+# -*- coding: utf-8 -*-
+"""
+Configured copies of tables for tenant schemas.
+
+Configuring each tenant copy of a table from scratch runs ModelConfigurator
+once per tenant. :func:`copy_table` and :func:`tenant_metadata` instead copy
+configured tables and replay only the parts of the configuration plan
+recorded for the original table which ``Table.to_metadata`` doesn't carry
+over correctly. Column defaults, server defaults and types are shared with the
+original table::
+
+
+    from sqlalchemy_defaults.tenants import tenant_metadata
+
+
+    tenants = dict(
+        (schema, tenant_metadata(Base.metadata, schema))
+        for schema in tenant_schemas
+    )
+
+
+Tenants using ``schema_translate_map`` don't need copies at all: the
+generated objects of a configured MetaData carry no schema of their own.
+"""
+import sqlalchemy as sa
+
+from sqlalchemy_defaults import ConfigurationManager, get_plan
+
+#: Operations replayed for table copies. Column defaults, types and check
+#: constraints are carried over by ``Table.to_metadata``.
+COPY_OPERATIONS = frozenset(['index', 'enum_name'])
+
+
+def plan_of(table):
+    plan = get_plan(table)
+    if plan is None:
+        raise ValueError(
+            'Table %r has not been configured.' % table.fullname
+        )
+    return plan
+
+
+def finish_copy(copy, plan, manager):
+    # Index copies lose their info and the where clauses of partial indexes
+    # still refer to the original table, so generated indexes are recreated
+    # from the plan instead. Foreign keys already covered by an index are
+    # never indexed, so an index on the same columns is the generated one.
+    indexed = set(
+        tuple(args[1]) for option, operation, args in plan
+        if operation == 'index'
+    )
+    for index in list(copy.indexes):
+        if tuple(column.key for column in index.columns) in indexed:
+            copy.indexes.discard(index)
+    manager.replay_table(copy, plan, operations=COPY_OPERATIONS)
+    return copy
+
+
+def copy_table(table, metadata, schema=None, manager=None):
+    """
+    Return a configured copy of given configured table in given MetaData.
+
+    :param table: configured Table
+    :param metadata: MetaData to copy the table to
+    :param schema: schema of the copy
+    :param manager: optional ConfigurationManager
+    :raises ValueError: if given table hasn't been configured
+    """
+    if manager is None:
+        manager = ConfigurationManager()
+    plan = plan_of(table)
+    return finish_copy(
+        table.to_metadata(metadata, schema=schema),
+        plan,
+        manager
+    )
+
+
+def tenant_metadata(metadata, schema, manager=None):
+    """
+    Return a new MetaData with configured copies of all tables of given
+    configured MetaData in given schema.
+
+    :param metadata: configured MetaData
+    :param schema: schema of the copies
+    :param manager: optional ConfigurationManager
+    :raises ValueError: if any of the tables hasn't been configured
+    """
+    if manager is None:
+        manager = ConfigurationManager()
+    tables = [(table, plan_of(table)) for table in metadata.tables.values()]
+    target = sa.MetaData(
+        naming_convention=metadata.naming_convention,
+        info=dict(metadata.info)
+    )
+    for table, plan in tables:
+        finish_copy(table.to_metadata(target, schema=schema), plan, manager)
+    return target
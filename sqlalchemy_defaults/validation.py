@@ -0,0 +1,160 @@
+# -*- coding: utf-8 -*-
+"""
+Python side validation based on the ``min``, ``max``, ``choices`` and
+``value_validators`` column info arguments.
+
+Each model is compiled once into a single validator function which checks
+only the columns having any of these arguments. Installing the
+``before_flush`` hook rejects invalid objects before any SQL is sent::
+
+
+    from sqlalchemy_defaults.validation import make_validated
+
+
+    make_validated(sa.orm.Session)
+"""
+import weakref
+
+import sqlalchemy as sa
+
+from sqlalchemy_defaults import choice_values
+
+_validators = weakref.WeakKeyDictionary()
+
+
+class ValidationError(ValueError):
+    """
+    Raised when objects being flushed fail validation.
+
+    :param errors: list of (object, attribute key, message) tuples
+    """
+    def __init__(self, errors):
+        self.errors = errors
+        ValueError.__init__(self, '; '.join(
+            '%s.%s: %s' % (obj.__class__.__name__, key, message)
+            for obj, key, message in errors
+        ))
+
+
+def compile_column_check(column):
+    """
+    Return a check function for given column or None if the column has no
+    validation arguments. The check function returns an error message for
+    invalid values and None for valid values. None values are not checked.
+
+    Validators from the ``value_validators`` info argument are called with
+    the value and should raise ValueError for invalid values. The
+    ``validators`` info argument is left alone, since it holds form style
+    validators.
+    """
+    info = column.info
+    choices = info.get('choices')
+    min_ = info.get('min')
+    max_ = info.get('max')
+    validators = tuple(info.get('value_validators') or ())
+    if not choices and min_ is None and max_ is None and not validators:
+        return None
+    choices = frozenset(choice_values(choices)) if choices else None
+
+    def check(value):
+        if value is None:
+            return None
+        if choices is not None and value not in choices:
+            return '%r is not a valid choice' % (value, )
+        if min_ is not None and value < min_:
+            return '%r is less than %r' % (value, min_)
+        if max_ is not None and value > max_:
+            return '%r is greater than %r' % (value, max_)
+        for validator in validators:
+            try:
+                validator(value)
+            except ValueError as e:
+                return str(e)
+        return None
+    return check
+
+
+def compile_validator(mapper):
+    """
+    Compile a validator function for given mapper. The returned function
+    takes an object and an optional collection of attribute keys to
+    validate and returns a list of (attribute key, message) tuples.
+    """
+    checks = []
+    for prop in mapper.column_attrs:
+        column = prop.columns[0]
+        if not isinstance(column, sa.Column):
+            # SQL expression column_property
+            continue
+        check = compile_column_check(column)
+        if check is not None:
+            checks.append((prop.key, check))
+    checks = tuple(checks)
+
+    def validate(obj, keys=None):
+        errors = []
+        values = obj.__dict__
+        for key, check in checks:
+            if keys is not None and key not in keys:
+                continue
+            if key in values:
+                message = check(values[key])
+                if message is not None:
+                    errors.append((key, message))
+        return errors
+    validate.keys = frozenset(key for key, _ in checks)
+    return validate
+
+
+def get_validator(class_):
+    """
+    Return the compiled validator of given mapped class, compiling it on
+    first use.
+    """
+    try:
+        return _validators[class_]
+    except KeyError:
+        validator = _validators[class_] = compile_validator(
+            sa.inspect(class_)
+        )
+        return validator
+
+
+def changed_keys(obj, keys):
+    """
+    Return the subset of given attribute keys which have changes in given
+    persistent object.
+    """
+    attrs = sa.inspect(obj).attrs
+    return [key for key in keys if attrs[key].history.has_changes()]
+
+
+def validate_session(session, flush_context=None, instances=None):
+    """
+    Validate new objects and changed attributes of dirty objects of given
+    session.
+
+    :raises ValidationError: if any of the objects is invalid
+    """
+    errors = []
+    for obj in session.new:
+        for key, message in get_validator(obj.__class__)(obj):
+            errors.append((obj, key, message))
+    for obj in session.dirty:
+        validator = get_validator(obj.__class__)
+        if not validator.keys:
+            continue
+        keys = changed_keys(obj, validator.keys)
+        if keys:
+            for key, message in validator(obj, keys):
+                errors.append((obj, key, message))
+    if errors:
+        raise ValidationError(errors)
+
+
+def make_validated(session=sa.orm.Session):
+    """
+    Validate objects in the ``before_flush`` hook of given session, session
+    class or sessionmaker.
+    """
+    sa.event.listen(session, 'before_flush', validate_session)
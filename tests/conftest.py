@@ -15,9 +15,13 @@ def dsn():
     return os.environ.get('DSN') or 'sqlite:///:memory:'
 
 
-@pytest.fixture
+@pytest.yield_fixture
 def Base():
-    return declarative_base()
+    Base = declarative_base()
+    yield Base
+    # Dispose the mappers so that later configure_mappers calls don't
+    # configure the classes of finished tests.
+    Base.registry.dispose()
 
 
 @pytest.yield_fixture
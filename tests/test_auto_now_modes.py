@@ -0,0 +1,75 @@
+# -*- coding: utf-8 -*-
+from datetime import datetime
+
+import pytest
+import sqlalchemy as sa
+
+from sqlalchemy_defaults import Column, configure_metadata
+
+
+@pytest.fixture
+def metadata():
+    return sa.MetaData()
+
+
+def event_table(metadata, auto_now):
+    return sa.Table(
+        'event',
+        metadata,
+        Column('id', sa.Integer, primary_key=True),
+        Column('created_at', sa.DateTime, auto_now=auto_now),
+    )
+
+
+class TestServerAutoNow(object):
+    def test_assigns_server_default_only(self, metadata):
+        table = event_table(metadata, 'server')
+        configure_metadata(metadata)
+        created_at = table.c.created_at
+        assert created_at.default is None
+        assert (
+            created_at.server_default.arg.__class__ ==
+            sa.func.now().__class__
+        )
+
+    def test_insert(self, metadata, connection):
+        table = event_table(metadata, 'server')
+        configure_metadata(metadata)
+        metadata.create_all(connection)
+        try:
+            connection.execute(table.insert(), [{}, {}])
+            values = connection.execute(
+                sa.select(table.c.created_at)
+            ).scalars().all()
+            assert len(values) == 2
+            assert all(value is not None for value in values)
+        finally:
+            metadata.drop_all(connection)
+
+
+class TestBatchAutoNow(object):
+    def test_one_timestamp_per_execution(self, metadata, connection):
+        table = event_table(metadata, 'batch')
+        configure_metadata(metadata)
+        metadata.create_all(connection)
+        try:
+            connection.execute(table.insert(), [{}, {}, {}])
+            values = connection.execute(
+                sa.select(table.c.created_at)
+            ).scalars().all()
+            assert len(values) == 3
+            assert len(set(values)) == 1
+            assert isinstance(values[0], datetime)
+        finally:
+            metadata.drop_all(connection)
+
+    def test_assigns_server_default(self, metadata):
+        table = event_table(metadata, 'batch')
+        configure_metadata(metadata)
+        assert table.c.created_at.server_default is not None
+
+
+def test_unknown_auto_now_mode(metadata):
+    event_table(metadata, 'client')
+    with pytest.raises(ValueError):
+        configure_metadata(metadata)
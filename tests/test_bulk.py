@@ -0,0 +1,88 @@
+# -*- coding: utf-8 -*-
+from datetime import datetime
+
+import pytest
+import sqlalchemy as sa
+
+from sqlalchemy_defaults import Column, configure_metadata
+from sqlalchemy_defaults.bulk import BulkDefaults
+
+
+@pytest.fixture
+def metadata():
+    return sa.MetaData()
+
+
+@pytest.fixture
+def table(metadata):
+    table = sa.Table(
+        'event',
+        metadata,
+        Column('id', sa.Integer, primary_key=True),
+        Column('kind', sa.Unicode(50), default=u'click'),
+        Column('priority', sa.Integer, default=1),
+        Column('is_processed', sa.Boolean),
+        Column('created_at', sa.DateTime, auto_now=True),
+        Column('label', sa.Unicode(50), default=lambda ctx: u'dynamic'),
+    )
+    configure_metadata(metadata)
+    return table
+
+
+class TestBulkDefaults(object):
+    def test_precomputes_defaults(self, table):
+        defaults = BulkDefaults(table)
+        assert defaults.scalars == {
+            'kind': u'click',
+            'priority': 1,
+            'is_processed': False
+        }
+        assert defaults.keys == set(
+            ['kind', 'priority', 'is_processed', 'created_at']
+        )
+
+    def test_fill(self, table):
+        rows = [{'kind': u'view'}, {}]
+        filled = BulkDefaults(table).fill(rows)
+        assert filled[0]['kind'] == u'view'
+        assert filled[1]['kind'] == u'click'
+        assert filled[1]['is_processed'] is False
+        assert isinstance(filled[1]['created_at'], datetime)
+        assert 'label' not in filled[1]
+        assert rows == [{'kind': u'view'}, {}]
+
+    def test_evaluates_callables_once_per_batch(self, table):
+        filled = BulkDefaults(table, callables='batch').fill([{}, {}, {}])
+        assert len(set(row['created_at'] for row in filled)) == 1
+
+    def test_batches_consume_generators_lazily(self, table):
+        consumed = []
+
+        def rows():
+            for index in range(5):
+                consumed.append(index)
+                yield {'priority': index}
+
+        batches = BulkDefaults(table).batches(rows(), batch_size=2)
+        assert len(next(batches)) == 2
+        assert consumed == [0, 1]
+        assert [len(batch) for batch in batches] == [2, 1]
+
+    def test_insert(self, table, connection):
+        table.metadata.create_all(connection)
+        try:
+            count = BulkDefaults(table, callables='batch').insert(
+                connection,
+                ({'priority': index} for index in range(10)),
+                batch_size=3
+            )
+            assert count == 10
+            rows = connection.execute(sa.select(table)).fetchall()
+            assert len(rows) == 10
+            assert all(row.label == u'dynamic' for row in rows)
+        finally:
+            table.metadata.drop_all(connection)
+
+    def test_unknown_callables_mode(self, table):
+        with pytest.raises(ValueError):
+            BulkDefaults(table, callables='never')
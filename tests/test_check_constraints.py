@@ -0,0 +1,117 @@
+# -*- coding: utf-8 -*-
+import pytest
+import six
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+from sqlalchemy.schema import CreateTable
+
+from sqlalchemy_defaults import Column, configure_metadata
+from sqlalchemy_defaults.ddl import compile_create_all
+
+
+def create_table_sql(table, engine):
+    return six.text_type(CreateTable(table).compile(engine))
+
+
+@pytest.fixture
+def metadata():
+    return sa.MetaData()
+
+
+@pytest.fixture
+def table(metadata):
+    return sa.Table(
+        'user',
+        metadata,
+        Column('id', sa.Integer, primary_key=True),
+        Column('age', sa.Integer, min=13, max=120),
+        Column('rating', sa.Integer, min=0),
+    )
+
+
+class TestCheckConstraintModes(object):
+    def test_between(self, table, engine):
+        table.info['lazy_options'] = {'min_max_check_constraints': 'between'}
+        configure_metadata(table.metadata)
+        sql = create_table_sql(table, engine)
+        assert (
+            'CONSTRAINT ck_user_age_min_max CHECK (age BETWEEN 13 AND 120)'
+            in sql
+        )
+        assert 'CONSTRAINT ck_user_rating_min_max CHECK (rating >= 0)' in sql
+
+    def test_table(self, table, engine):
+        table.info['lazy_options'] = {'min_max_check_constraints': 'table'}
+        configure_metadata(table.metadata)
+        sql = create_table_sql(table, engine)
+        assert (
+            'CONSTRAINT ck_user_min_max CHECK '
+            '(age BETWEEN 13 AND 120 AND rating >= 0)'
+            in sql
+        )
+        assert len([
+            constraint for constraint in table.constraints
+            if isinstance(constraint, sa.CheckConstraint)
+        ]) == 1
+
+    def test_uses_naming_convention(self, engine):
+        metadata = sa.MetaData(
+            naming_convention={'ck': 'chk_%(table_name)s_%(constraint_name)s'}
+        )
+        table = sa.Table(
+            'user',
+            metadata,
+            Column('id', sa.Integer, primary_key=True),
+            Column('age', sa.Integer, min=13, max=120),
+            info={'lazy_options': {'min_max_check_constraints': 'between'}}
+        )
+        configure_metadata(metadata)
+        assert 'CONSTRAINT chk_user_age_min_max' in create_table_sql(
+            table, engine
+        )
+
+    def test_unknown_mode(self, table):
+        table.info['lazy_options'] = {'min_max_check_constraints': 'single'}
+        with pytest.raises(ValueError):
+            configure_metadata(table.metadata)
+
+
+class TestLongNames(object):
+    def test_truncates_generated_names(self, metadata):
+        table_name = 'customer_subscription_billing_adjustment_events'
+        column_name = 'adjustment_amount_in_cents'
+        metadata.info['lazy_options'] = {
+            'min_max_check_constraints': 'between',
+            'compact_choices': True
+        }
+        sa.Table(
+            table_name,
+            metadata,
+            Column('id', sa.Integer, primary_key=True),
+            Column('parent_id', sa.Integer),
+            Column('parent_kind', sa.Integer),
+            Column(column_name, sa.Integer, min=0, max=100000),
+            Column(
+                'adjustment_reason_category_code',
+                sa.Unicode(20),
+                choices=[u'refund', u'credit']
+            ),
+            sa.ForeignKeyConstraint(
+                ['parent_id', 'parent_kind'],
+                [table_name + '.id', table_name + '.parent_kind']
+            ),
+        )
+        configure_metadata(metadata)
+        sql = '\n'.join(
+            compile_create_all(metadata, postgresql.dialect())
+        )
+        names = [
+            line.split()[1] for line in sql.splitlines()
+            if line.strip().startswith('CONSTRAINT')
+        ]
+        names.extend(
+            line.split()[2] for line in sql.splitlines()
+            if line.startswith('CREATE INDEX')
+        )
+        assert len(names) == 3
+        assert all(len(name) <= 63 for name in names)
@@ -0,0 +1,131 @@
+# -*- coding: utf-8 -*-
+import sys
+
+import pytest
+
+from sqlalchemy_defaults.cli import main
+
+MODELS = '''
+import sqlalchemy as sa
+from sqlalchemy.ext.declarative import declarative_base
+
+from sqlalchemy_defaults import Column
+
+Base = declarative_base()
+
+
+class User(Base):
+    __tablename__ = 'user'
+    __lazy_options__ = {}
+
+    id = Column(sa.Integer, primary_key=True)
+    is_active = Column(sa.Boolean)
+
+
+class Article(Base):
+    __tablename__ = 'article'
+    __lazy_options__ = {}
+
+    id = Column(sa.Integer, primary_key=True)
+    author_id = Column(sa.Integer, sa.ForeignKey(User.id))
+    kind = Column(sa.Unicode(50), default=u'news')
+    rating = Column(sa.Integer, min=1, max=5)
+    status = Column(sa.Enum('draft', 'published'))
+
+
+class Plain(Base):
+    __tablename__ = 'plain'
+
+    id = Column(sa.Integer, primary_key=True)
+    flag = Column(sa.Boolean)
+    score = Column(sa.Integer, min=1, max=5)
+
+
+log = sa.Table(
+    'log',
+    Base.metadata,
+    Column('id', sa.Integer, primary_key=True),
+    Column('level', sa.Integer, min=0),
+)
+'''
+
+
+@pytest.fixture
+def models_module(tmpdir, monkeypatch, request):
+    name = 'cli_models_%s' % request.node.name.replace('[', '_').strip(']')
+    tmpdir.join(name + '.py').write(MODELS)
+    monkeypatch.syspath_prepend(str(tmpdir))
+    yield name
+    sys.modules.pop(name, None)
+
+
+class TestDDLCommand(object):
+    def test_writes_to_stdout(self, models_module, capsys):
+        main(['ddl', models_module, '--dialect', 'sqlite'])
+        out = capsys.readouterr()[0]
+        assert 'CREATE TABLE user' in out
+        assert "kind VARCHAR(50) DEFAULT 'news' NOT NULL" in out
+        assert 'CHECK (rating >= 1)' in out
+        assert 'CREATE INDEX ix_article_author_id ON article (author_id);' in (
+            out
+        )
+
+    def test_writes_dialect_files(self, models_module, tmpdir):
+        output = tmpdir.join('ddl')
+        main([
+            'ddl',
+            models_module,
+            '--dialect', 'sqlite',
+            '--dialect', 'postgresql',
+            '--output-dir', str(output),
+            '--jobs', '2',
+        ])
+        assert sorted(output.listdir(sort=True)) == [
+            output.join('postgresql.sql'),
+            output.join('sqlite.sql'),
+        ]
+        postgresql = output.join('postgresql.sql').read()
+        assert (
+            "CREATE TYPE status_enum AS ENUM ('draft', 'published');"
+        ) in postgresql
+        assert 'is_active BOOLEAN DEFAULT false NOT NULL' in postgresql
+
+    def test_multiple_dialects_to_stdout(self, models_module, capsys):
+        main([
+            'ddl',
+            models_module,
+            '--dialect', 'sqlite',
+            '--dialect', 'mysql',
+        ])
+        out = capsys.readouterr()[0]
+        assert out.index('-- sqlite') < out.index('-- mysql')
+        assert out.count('CREATE TABLE article') == 2
+
+    def test_configures_like_application(self, models_module, capsys):
+        main(['ddl', models_module, '--dialect', 'sqlite'])
+        out = capsys.readouterr()[0]
+        plain = out[out.index('CREATE TABLE plain'):]
+        plain = plain[:plain.index(';')]
+        assert 'DEFAULT' not in plain
+        assert 'CHECK' not in plain
+        assert 'CHECK (level >= 0)' not in out
+
+    def test_configure_core_tables(self, models_module, capsys):
+        main([
+            'ddl',
+            models_module,
+            '--dialect', 'sqlite',
+            '--configure-core-tables',
+        ])
+        out = capsys.readouterr()[0]
+        assert 'CHECK (level >= 0)' in out
+        assert 'CHECK (score >= 1)' not in out
+
+    def test_jobs_must_be_positive(self, models_module, capsys):
+        with pytest.raises(SystemExit):
+            main(['ddl', models_module, '--jobs', '0'])
+        assert 'must be at least 1' in capsys.readouterr()[1]
+
+    def test_unknown_target(self, models_module):
+        with pytest.raises(AttributeError):
+            main(['ddl', models_module, '--target', 'Missing'])
@@ -0,0 +1,94 @@
+# -*- coding: utf-8 -*-
+import sqlalchemy as sa
+
+from sqlalchemy_defaults import bool_or_str, Column
+
+
+class TestColumn(object):
+    def test_stores_only_given_info_arguments(self):
+        column = Column(sa.Integer, min=1, label=u'Age')
+        assert column.info == {'min': 1, 'label': u'Age'}
+
+    def test_explicit_info_takes_precedence(self):
+        column = Column(sa.Integer, min=1, info={'min': 2})
+        assert column.info == {'min': 2}
+
+    def test_property_defaults(self):
+        column = Column(sa.Integer)
+        assert column.choices == []
+        assert column.validators == []
+        assert column.description == ''
+
+    def test_properties(self):
+        column = Column(
+            sa.Unicode(20),
+            choices=[u'a', u'b'],
+            description=u'Some column'
+        )
+        assert column.choices == [u'a', u'b']
+        assert column.description == u'Some column'
+
+    def test_strings_and_booleans_not_nullable_by_default(self):
+        assert Column(sa.Unicode(20)).nullable is False
+        assert Column('name', sa.Unicode).nullable is False
+        assert Column(sa.Boolean()).nullable is False
+        assert Column(sa.Integer).nullable is True
+
+    def test_explicit_nullable(self):
+        assert Column(sa.Unicode(20), nullable=True).nullable is True
+
+
+class TestColumnCopy(object):
+    def copy(self, column, monkeypatch):
+        def fail(type_):
+            raise AssertionError('Copies should not be classified.')
+
+        with monkeypatch.context() as patch:
+            patch.setattr('sqlalchemy_defaults.bool_or_str', fail)
+            return column._copy()
+
+    def test_keeps_nullable(self, monkeypatch):
+        assert self.copy(
+            Column(sa.Unicode(20)), monkeypatch
+        ).nullable is False
+        assert self.copy(
+            Column(sa.Unicode(20), nullable=True), monkeypatch
+        ).nullable is True
+        assert self.copy(Column(sa.Integer), monkeypatch).nullable is True
+
+    def test_keeps_info_and_properties(self, monkeypatch):
+        validator = lambda value: value  # noqa
+        column = Column(
+            sa.Unicode(20),
+            choices=[u'a', u'b'],
+            validators=[validator],
+            min=u'a'
+        )
+        copy = self.copy(column, monkeypatch)
+        assert isinstance(copy, Column)
+        assert copy.choices == [u'a', u'b']
+        assert copy.validators == [validator]
+        copy.info['min'] = u'b'
+        assert column.info['min'] == u'a'
+
+    def test_mixin_columns(self, Base):
+        class Audited(object):
+            updated_by = Column(sa.Unicode(100), description=u'Editor')
+
+        class Article(Audited, Base):
+            __tablename__ = 'article'
+            id = Column(sa.Integer, primary_key=True)
+
+        column = Article.__table__.c.updated_by
+        assert column is not Audited.updated_by
+        assert column.nullable is False
+        assert column.description == u'Editor'
+
+
+class TestBoolOrStr(object):
+    def test_classes_and_instances(self):
+        assert bool_or_str(sa.Unicode)
+        assert bool_or_str(sa.Unicode(20))
+        assert bool_or_str(sa.Boolean())
+        assert not bool_or_str(sa.Integer)
+        assert not bool_or_str('name')
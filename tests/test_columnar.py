@@ -0,0 +1,101 @@
+# -*- coding: utf-8 -*-
+from datetime import date
+
+import pytest
+import sqlalchemy as sa
+
+from sqlalchemy_defaults import Column
+from sqlalchemy_defaults.columnar import null_mask, validate_columns
+
+np = pytest.importorskip('numpy')
+
+
+@pytest.fixture
+def table():
+    return sa.Table(
+        'event',
+        sa.MetaData(),
+        Column('id', sa.Integer, primary_key=True),
+        Column('kind', sa.Unicode(20), choices=[u'click', u'view']),
+        Column('priority', sa.Integer, min=0, max=10),
+        Column('score', sa.Float, min=0, nullable=True),
+        Column('day', sa.Date, min=date(2000, 1, 1), nullable=True),
+    )
+
+
+@pytest.fixture
+def data():
+    return {
+        'kind': [u'click', u'view', u'buy', None],
+        'priority': np.array([1, 11, 5, -1]),
+        'score': np.array([0.5, np.nan, -1.0, 2.0]),
+        'day': np.array(
+            ['2010-01-01', '1999-01-01', 'NaT', '2020-01-01'],
+            dtype='datetime64[D]'
+        ),
+    }
+
+
+class TestValidateColumns(object):
+    def test_mask(self, table, data):
+        report = validate_columns(table, data)
+        assert report.mask.tolist() == [False, True, True, True]
+        assert report.invalid_rows.tolist() == [1, 2, 3]
+        assert not report.valid
+
+    def test_counts(self, table, data):
+        assert validate_columns(table, data).counts() == {
+            ('kind', 'choices'): 1,
+            ('kind', 'null'): 1,
+            ('priority', 'max'): 1,
+            ('priority', 'min'): 1,
+            ('score', 'min'): 1,
+            ('day', 'min'): 1,
+        }
+
+    def test_missing_required_columns(self, table):
+        report = validate_columns(table, {'priority': np.array([1, 2])})
+        assert report.counts() == {('kind', 'missing'): 2}
+
+    def test_different_lengths(self, table):
+        with pytest.raises(ValueError):
+            validate_columns(table, {'priority': [1], 'kind': [u'a', u'b']})
+
+    def test_pandas(self, table, data):
+        pd = pytest.importorskip('pandas')
+        report = validate_columns(table, pd.DataFrame(data))
+        assert report.mask.tolist() == [False, True, True, True]
+
+    def test_pandas_nullable_dtypes(self, table, data):
+        pd = pytest.importorskip('pandas')
+        dataframe = pd.DataFrame({
+            'kind': pd.array(data['kind'], dtype='string'),
+            'priority': pd.array([1, 11, None, -1], dtype='Int64'),
+        })
+        assert validate_columns(table, dataframe).counts() == {
+            ('kind', 'choices'): 1,
+            ('kind', 'null'): 1,
+            ('priority', 'max'): 1,
+            ('priority', 'min'): 1,
+        }
+
+    def test_arrow(self, table, data):
+        pa = pytest.importorskip('pyarrow')
+        arrow_table = pa.table({
+            'kind': data['kind'],
+            'priority': data['priority'],
+        })
+        report = validate_columns(table, arrow_table)
+        assert report.mask.tolist() == [False, True, True, True]
+
+
+class TestNullMask(object):
+    def test_object_array(self):
+        values = np.array([u'a', None, float('nan'), 0, u''], dtype=object)
+        assert null_mask(values).tolist() == [
+            False, True, True, False, False
+        ]
+
+    def test_float_array(self):
+        values = np.array([0.0, np.nan])
+        assert null_mask(values).tolist() == [False, True]
@@ -0,0 +1,76 @@
+# -*- coding: utf-8 -*-
+import pytest
+import six
+import sqlalchemy as sa
+from sqlalchemy.schema import CreateTable
+
+from sqlalchemy_defaults import ChoiceCode, Column
+
+
+@pytest.fixture
+def lazy_options():
+    return {'compact_choices': True}
+
+
+@pytest.fixture
+def Event(Base, lazy_options):
+    class Event(Base):
+        __tablename__ = 'event'
+        __lazy_options__ = lazy_options
+
+        id = Column(sa.Integer, primary_key=True)
+        status = Column(
+            sa.Unicode(20),
+            choices=[(u'new', u'New'), (u'done', u'Done')],
+            default=u'new'
+        )
+        kind = Column(sa.Unicode(20), choices=[u'a', u'b'], nullable=True)
+        name = Column(sa.Unicode(20), nullable=True)
+    return Event
+
+
+@pytest.fixture
+def models(Event):
+    return [Event]
+
+
+class TestChoiceCode(object):
+    def test_codes(self):
+        type_ = ChoiceCode([(u'new', u'New'), (u'done', u'Done')])
+        assert type_.process_bind_param(u'done', None) == 1
+        assert type_.process_result_value(0, None) == u'new'
+        assert type_.process_bind_param(None, None) is None
+
+    def test_invalid_choice(self):
+        with pytest.raises(ValueError):
+            ChoiceCode([u'new']).process_bind_param(u'old', None)
+
+
+@pytest.mark.usefixtures('lazy_configured', 'Session')
+class TestCompactChoices(object):
+    def test_replaces_type(self, Event):
+        assert isinstance(Event.__table__.c.status.type, ChoiceCode)
+        assert isinstance(Event.__table__.c.kind.type, ChoiceCode)
+        assert not isinstance(Event.__table__.c.name.type, ChoiceCode)
+
+    def test_converts_server_default(self, Event):
+        assert Event.__table__.c.status.server_default.arg == u'0'
+
+    def test_check_constraint(self, Event, engine):
+        sql = six.text_type(CreateTable(Event.__table__).compile(engine))
+        assert 'status SMALLINT' in sql
+        assert (
+            'CONSTRAINT ck_event_status_choices CHECK '
+            '(status BETWEEN 0 AND 1)'
+        ) in sql
+
+    def test_round_trip(self, Event, session, connection):
+        session.add(Event(status=u'done', kind=u'b'))
+        session.add(Event())
+        session.flush()
+        assert connection.execute(
+            sa.text('SELECT status, kind FROM event ORDER BY id')
+        ).fetchall() == [(1, 1), (0, None)]
+        assert session.query(Event.status).filter(
+            Event.status == u'done'
+        ).scalar() == u'done'
@@ -0,0 +1,91 @@
+# -*- coding: utf-8 -*-
+import pytest
+import sqlalchemy as sa
+
+from sqlalchemy_defaults import Column, configure_metadata
+
+
+@pytest.fixture
+def metadata():
+    return sa.MetaData()
+
+
+@pytest.fixture
+def event_table(metadata):
+    return sa.Table(
+        'event',
+        metadata,
+        Column('id', sa.Integer, primary_key=True),
+        Column('is_public', sa.Boolean),
+        Column('kind', sa.Unicode(50), default=u'default'),
+        Column('priority', sa.Integer, default=1, min=1, max=5),
+    )
+
+
+class TestConfigureMetadata(object):
+    def test_configures_core_tables(self, metadata, event_table):
+        configure_metadata(metadata)
+        assert event_table.c.is_public.default.arg is False
+        assert event_table.c.kind.server_default.arg == u'default'
+        assert event_table.c.priority.server_default.arg == '1'
+
+    def test_table_options(self, metadata, event_table):
+        event_table.info['lazy_options'] = {'string_defaults': False}
+        configure_metadata(metadata)
+        assert event_table.c.kind.server_default is None
+        assert event_table.c.priority.server_default.arg == '1'
+
+    def test_shares_manager(self, metadata, event_table):
+        sa.Table(
+            'other',
+            metadata,
+            Column('id', sa.Integer, primary_key=True),
+            Column('is_public', sa.Boolean),
+        )
+        manager = configure_metadata(metadata)
+        assert list(manager.type_handlers).count(sa.Boolean) == 1
+
+    def test_configures_declarative_models(self, Base):
+        class User(Base):
+            __tablename__ = 'user'
+            __lazy_options__ = {'numeric_defaults': False}
+
+            id = Column(sa.Integer, primary_key=True)
+            age = Column(sa.Integer, default=16)
+            is_active = Column(sa.Boolean)
+
+        configure_metadata(Base)
+        assert User.__table__.c.age.server_default is None
+        assert User.__table__.c.is_active.default.arg is False
+
+    def test_configures_imperatively_mapped_classes(self, metadata):
+        registry = sa.orm.registry(metadata=metadata)
+        table = sa.Table(
+            'user',
+            metadata,
+            Column('id', sa.Integer, primary_key=True),
+            Column('age', sa.Integer, default=16),
+        )
+
+        class User(object):
+            __lazy_options__ = {'numeric_defaults': False}
+
+        registry.map_imperatively(User, table)
+        configure_metadata(registry)
+        assert table.c.age.server_default is None
+
+    def test_configures_reflected_tables(self, metadata, connection):
+        connection.execute(sa.text(
+            'CREATE TABLE account (id INTEGER PRIMARY KEY, balance INTEGER)'
+        ))
+        try:
+            reflected = sa.MetaData()
+            account = sa.Table('account', reflected, autoload_with=connection)
+            account.c.balance.info.update({'min': 0})
+            configure_metadata(reflected)
+            assert any(
+                isinstance(constraint, sa.CheckConstraint)
+                for constraint in account.constraints
+            )
+        finally:
+            connection.execute(sa.text('DROP TABLE account'))
@@ -0,0 +1,110 @@
+# -*- coding: utf-8 -*-
+import threading
+
+import pytest
+import sqlalchemy as sa
+
+from sqlalchemy_defaults import (
+    Column,
+    ConfigurationManager,
+    configure_metadata,
+    is_configured
+)
+
+
+def check_constraints(table):
+    return [
+        constraint for constraint in table.constraints
+        if isinstance(constraint, sa.CheckConstraint)
+    ]
+
+
+@pytest.fixture
+def Employee(Base):
+    class Employee(Base):
+        __tablename__ = 'employee'
+        __lazy_options__ = {}
+
+        id = Column(sa.Integer, primary_key=True)
+        type = Column(sa.Unicode(20))
+        age = Column(sa.Integer, min=16, max=100)
+
+        __mapper_args__ = {'polymorphic_on': type}
+    return Employee
+
+
+@pytest.fixture
+def Manager(Employee):
+    class Manager(Employee):
+        __mapper_args__ = {'polymorphic_identity': u'manager'}
+    return Manager
+
+
+@pytest.fixture
+def Engineer(Employee):
+    class Engineer(Employee):
+        __mapper_args__ = {'polymorphic_identity': u'engineer'}
+    return Engineer
+
+
+@pytest.fixture
+def models(Employee, Manager, Engineer):
+    return [Employee, Manager, Engineer]
+
+
+@pytest.mark.usefixtures('lazy_configured', 'Session')
+class TestSingleTableInheritance(object):
+    def test_configures_table_once(self, Employee):
+        assert len(check_constraints(Employee.__table__)) == 2
+        assert is_configured(Employee.__table__)
+
+
+class TestConfigureOnce(object):
+    @pytest.fixture
+    def table(self):
+        return sa.Table(
+            'employee',
+            sa.MetaData(),
+            Column('id', sa.Integer, primary_key=True),
+            Column('age', sa.Integer, min=16, max=100),
+        )
+
+    def test_reconfiguring_is_noop(self, table):
+        manager = ConfigurationManager()
+        assert manager.configure_table(table) is True
+        assert manager.configure_table(table) is False
+        configure_metadata(table.metadata)
+        assert len(check_constraints(table)) == 2
+
+    def test_concurrent_configuration(self, table):
+        threads = [
+            threading.Thread(
+                target=ConfigurationManager().configure_table,
+                args=(table, )
+            )
+            for _ in range(8)
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        assert len(check_constraints(table)) == 2
+
+    @pytest.mark.parametrize('info', [
+        {'auto_now': 'bogus'},
+        {'lazy_options': {'min_max_check_constraints': 'bogus'}},
+        {'lazy_options': {'unknown': True}},
+    ])
+    def test_failed_configuration_can_be_retried(self, table, info):
+        column = Column('created_at', sa.DateTime, auto_now=True)
+        table.append_column(column)
+        column.info.update(info)
+        for _ in range(2):
+            with pytest.raises(ValueError):
+                ConfigurationManager().configure_table(table)
+        assert not is_configured(table)
+        assert check_constraints(table) == []
+        column.info.clear()
+        column.info['auto_now'] = True
+        assert ConfigurationManager().configure_table(table) is True
+        assert len(check_constraints(table)) == 2
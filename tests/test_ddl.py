@@ -0,0 +1,240 @@
+# -*- coding: utf-8 -*-
+import pytest
+import sqlalchemy as sa
+
+from sqlalchemy_defaults import Column, configure_metadata, is_generated
+from sqlalchemy_defaults.ddl import (
+    compile_create_all,
+    create_post_load,
+    create_tables,
+    DDLCache,
+    generated_constraints,
+    generated_indexes,
+    metadata_fingerprint
+)
+
+
+@pytest.fixture
+def metadata():
+    metadata = sa.MetaData()
+    sa.Table(
+        'user',
+        metadata,
+        Column('id', sa.Integer, primary_key=True),
+        Column('name', sa.Unicode(50), index=True),
+    )
+    sa.Table(
+        'article',
+        metadata,
+        Column('id', sa.Integer, primary_key=True),
+        Column('author_id', sa.Integer, sa.ForeignKey('user.id')),
+        Column('rating', sa.Integer, min=1, max=5),
+    )
+    configure_metadata(metadata)
+    return metadata
+
+
+@pytest.fixture
+def article(metadata):
+    return metadata.tables['article']
+
+
+@pytest.yield_fixture
+def created(metadata, connection):
+    yield
+    metadata.drop_all(connection)
+
+
+def index_names(connection, table_name):
+    return sorted(
+        index['name']
+        for index in sa.inspect(connection).get_indexes(table_name)
+    )
+
+
+class TestGeneratedObjects(object):
+    def test_tags_generated_objects(self, metadata, article):
+        assert len(generated_constraints(article)) == 2
+        assert len(generated_indexes(article)) == 1
+        user = metadata.tables['user']
+        assert not any(is_generated(index) for index in user.indexes)
+
+
+@pytest.mark.usefixtures('created')
+class TestTwoPhaseDDL(object):
+    def test_create_tables_omits_generated_objects(
+        self, metadata, article, connection
+    ):
+        create_tables(metadata, connection)
+        assert index_names(connection, 'article') == []
+        assert index_names(connection, 'user') == ['ix_user_name']
+        connection.execute(article.insert(), {'rating': 10})
+        assert len(generated_constraints(article)) == 2
+        assert len(generated_indexes(article)) == 1
+
+    def test_create_post_load(self, metadata, article, connection):
+        create_tables(metadata, connection)
+        connection.execute(article.insert(), {'rating': 3})
+        create_post_load(metadata, connection)
+        assert index_names(connection, 'article') == ['ix_article_author_id']
+        assert connection.execute(
+            sa.select(sa.func.count()).select_from(article)
+        ).scalar() == 1
+        with pytest.raises(sa.exc.IntegrityError):
+            connection.execute(article.insert(), {'rating': 10})
+
+
+class TestSQLiteForeignKeys(object):
+    @pytest.yield_fixture
+    def engine(self, tmpdir):
+        engine = sa.create_engine('sqlite:///%s' % tmpdir.join('ddl.db'))
+
+        def enforce_foreign_keys(dbapi_connection, connection_record):
+            dbapi_connection.execute('PRAGMA foreign_keys = ON')
+
+        sa.event.listen(engine, 'connect', enforce_foreign_keys)
+        yield engine
+        engine.dispose()
+
+    @pytest.fixture
+    def metadata(self):
+        metadata = sa.MetaData()
+        sa.Table(
+            'parent',
+            metadata,
+            Column('id', sa.Integer, primary_key=True),
+            Column('score', sa.Integer, min=0),
+        )
+        sa.Table(
+            'child',
+            metadata,
+            Column('id', sa.Integer, primary_key=True),
+            Column(
+                'parent_id',
+                sa.Integer,
+                sa.ForeignKey('parent.id', ondelete='CASCADE')
+            ),
+        )
+        configure_metadata(metadata)
+        return metadata
+
+    def test_keeps_cascading_children(self, metadata, engine):
+        create_tables(metadata, engine)
+        with engine.begin() as connection:
+            connection.execute(
+                metadata.tables['parent'].insert(), {'id': 1, 'score': 5}
+            )
+            connection.execute(
+                metadata.tables['child'].insert(), {'id': 1, 'parent_id': 1}
+            )
+        create_post_load(metadata, engine)
+        with engine.connect() as connection:
+            assert connection.execute(
+                sa.select(sa.func.count()).select_from(
+                    metadata.tables['child']
+                )
+            ).scalar() == 1
+            assert connection.exec_driver_sql(
+                'PRAGMA foreign_keys'
+            ).scalar() == 1
+            with pytest.raises(sa.exc.IntegrityError):
+                connection.execute(
+                    metadata.tables['parent'].insert(), {'score': -1}
+                )
+
+    def test_raises_inside_transaction(self, metadata, engine):
+        create_tables(metadata, engine)
+        with engine.connect() as connection:
+            with connection.begin():
+                connection.execute(
+                    metadata.tables['parent'].insert(), {'id': 1, 'score': 5}
+                )
+                with pytest.raises(ValueError):
+                    create_post_load(metadata, connection)
+            assert connection.exec_driver_sql(
+                'PRAGMA foreign_keys'
+            ).scalar() == 1
+
+
+class TestDDLCache(object):
+    def test_fingerprint_changes_with_schema(self, metadata, article):
+        fingerprint = metadata_fingerprint(metadata)
+        assert metadata_fingerprint(metadata) == fingerprint
+        sa.Index('ix_article_rating', article.c.rating)
+        assert metadata_fingerprint(metadata) != fingerprint
+
+    def test_fingerprint_changes_with_bounds(self, connection):
+        def make_metadata(min_):
+            metadata = sa.MetaData()
+            sa.Table(
+                'user',
+                metadata,
+                Column('id', sa.Integer, primary_key=True),
+                Column('age', sa.Integer, min=min_),
+            )
+            configure_metadata(metadata)
+            return metadata
+
+        cache = DDLCache()
+        teens = make_metadata(13)
+        adults = make_metadata(18)
+        assert metadata_fingerprint(teens) != metadata_fingerprint(adults)
+        assert 'CHECK (age >= 13)' in cache.get(
+            teens, connection.dialect
+        )[0]
+        assert 'CHECK (age >= 18)' in cache.get(
+            adults, connection.dialect
+        )[0]
+
+    def test_fingerprint_changes_with_index_where(self):
+        def make_metadata(rating):
+            metadata = sa.MetaData()
+            table = sa.Table(
+                'article',
+                metadata,
+                Column('id', sa.Integer, primary_key=True),
+                Column('rating', sa.Integer),
+            )
+            sa.Index(
+                'ix_article_rating',
+                table.c.rating,
+                postgresql_where=table.c.rating > rating
+            )
+            return metadata
+
+        assert metadata_fingerprint(make_metadata(1)) != (
+            metadata_fingerprint(make_metadata(2))
+        )
+
+    def test_compiles_generated_objects(self, metadata, connection):
+        statements = compile_create_all(metadata, connection.dialect)
+        assert len(statements) == 4
+        assert 'CHECK (rating >= 1)' in statements[2]
+        assert statements[3].startswith(
+            'CREATE INDEX ix_article_author_id'
+        )
+
+    @pytest.mark.usefixtures('created')
+    def test_create_all(self, metadata, article, connection):
+        DDLCache().create_all(metadata, connection)
+        assert index_names(connection, 'article') == ['ix_article_author_id']
+        with pytest.raises(sa.exc.IntegrityError):
+            connection.execute(article.insert(), {'rating': 10})
+
+    def test_reuses_compiled_statements(
+        self, metadata, connection, monkeypatch
+    ):
+        cache = DDLCache()
+        statements = cache.get(metadata, connection.dialect)
+        monkeypatch.setattr(
+            'sqlalchemy_defaults.ddl.compile_create_all', None
+        )
+        assert cache.get(metadata, connection.dialect) is statements
+
+    def test_persists_to_directory(self, metadata, connection, tmpdir):
+        directory = str(tmpdir.join('cache'))
+        statements = DDLCache(directory).get(metadata, connection.dialect)
+        assert len(tmpdir.join('cache').listdir()) == 1
+        assert DDLCache(directory).get(
+            metadata, connection.dialect
+        ) == statements
@@ -0,0 +1,171 @@
+# -*- coding: utf-8 -*-
+import sys
+import threading
+
+import pytest
+import sqlalchemy as sa
+
+from sqlalchemy_defaults import (
+    Column,
+    configure_deferred,
+    DeferredConfigurationManager,
+    is_configured,
+    make_lazy_configured
+)
+
+
+@pytest.fixture
+def manager():
+    return DeferredConfigurationManager()
+
+
+@pytest.fixture
+def User(Base):
+    class User(Base):
+        __tablename__ = 'user'
+        __lazy_options__ = {}
+
+        id = Column(sa.Integer, primary_key=True)
+        is_active = Column(sa.Boolean)
+        age = Column(sa.Integer, min=16, max=100)
+    return User
+
+
+@pytest.fixture
+def Article(Base):
+    class Article(Base):
+        __tablename__ = 'article'
+        __lazy_options__ = {}
+
+        id = Column(sa.Integer, primary_key=True)
+        is_published = Column(sa.Boolean)
+    return Article
+
+
+@pytest.yield_fixture
+def deferred(manager, User, Article):
+    make_lazy_configured(sa.orm.Mapper, manager)
+    sa.orm.configure_mappers()
+    yield
+    sa.event.remove(sa.orm.Mapper, 'mapper_configured', manager)
+
+
+@pytest.mark.usefixtures('deferred')
+class TestDeferredConfiguration(object):
+    def test_defers_configuration(self, User, Article):
+        assert not is_configured(User.__table__)
+        assert not is_configured(Article.__table__)
+        assert User.__table__.c.is_active.default is None
+
+    def test_configures_on_create_all(self, Base, User, connection):
+        Base.metadata.create_all(connection)
+        assert is_configured(User.__table__)
+        assert User.__table__.c.is_active.default.arg is False
+        with pytest.raises(sa.exc.IntegrityError):
+            connection.execute(User.__table__.insert(), {'age': 10})
+
+    def test_configures_on_table_create(self, User, Article, connection):
+        User.__table__.create(connection)
+        assert is_configured(User.__table__)
+        assert not is_configured(Article.__table__)
+
+    def test_configures_on_first_insert(self, User, Article, connection):
+        connection.exec_driver_sql(
+            'CREATE TABLE user (id INTEGER PRIMARY KEY, '
+            'is_active BOOLEAN NOT NULL, age INTEGER)'
+        )
+        connection.execute(User.__table__.insert(), {'age': 20})
+        assert is_configured(User.__table__)
+        assert not is_configured(Article.__table__)
+        assert connection.execute(
+            sa.select(User.__table__.c.is_active)
+        ).scalar() is False
+
+    def test_configures_on_flush(self, User, Article, connection):
+        connection.exec_driver_sql(
+            'CREATE TABLE user (id INTEGER PRIMARY KEY, '
+            'is_active BOOLEAN NOT NULL, age INTEGER)'
+        )
+        session = sa.orm.Session(bind=connection)
+        session.add(User(age=20))
+        session.flush()
+        assert is_configured(User.__table__)
+        assert not is_configured(Article.__table__)
+        assert session.query(User).one().is_active is False
+        session.close()
+
+    def test_configure_deferred(self, Base, User, Article):
+        configure_deferred(Base.metadata)
+        assert is_configured(User.__table__)
+        assert is_configured(Article.__table__)
+
+    def test_configures_once_across_threads(self, manager, User):
+        configured = []
+        manager.listeners.append(configured.append)
+        start = threading.Event()
+
+        def trigger():
+            start.wait()
+            configure_deferred()
+
+        threads = [threading.Thread(target=trigger) for _ in range(8)]
+        for thread in threads:
+            thread.start()
+        start.set()
+        for thread in threads:
+            thread.join()
+        assert len(configured) == 2
+        assert len([
+            constraint for constraint in User.__table__.constraints
+            if isinstance(constraint, sa.CheckConstraint)
+        ]) == 2
+
+
+class TestConcurrentConfiguration(object):
+    @pytest.yield_fixture
+    def frequent_thread_switches(self):
+        # Switch threads as often as possible to expose races.
+        if not hasattr(sys, 'setswitchinterval'):
+            yield
+            return
+        interval = sys.getswitchinterval()
+        sys.setswitchinterval(1e-6)
+        yield
+        sys.setswitchinterval(interval)
+
+    @pytest.mark.usefixtures('frequent_thread_switches')
+    def test_many_tables_across_threads(self, manager):
+        for trial in range(10):
+            self.configure_concurrently(manager)
+
+    def configure_concurrently(self, manager):
+        metadata = sa.MetaData()
+        tables = [
+            sa.Table(
+                'table_%d' % number,
+                metadata,
+                Column('id', sa.Integer, primary_key=True),
+                Column('score', sa.Integer, min=0),
+            )
+            for number in range(200)
+        ]
+        for table in tables:
+            manager.defer_table(table)
+        errors = []
+        start = threading.Event()
+
+        def trigger():
+            start.wait()
+            try:
+                configure_deferred(metadata)
+            except Exception as error:
+                errors.append(error)
+
+        threads = [threading.Thread(target=trigger) for _ in range(8)]
+        for thread in threads:
+            thread.start()
+        start.set()
+        for thread in threads:
+            thread.join()
+        assert errors == []
+        assert all(is_configured(table) for table in tables)
@@ -0,0 +1,251 @@
+# -*- coding: utf-8 -*-
+import pytest
+import sqlalchemy as sa
+
+from sqlalchemy_defaults import Column, configure_metadata
+from sqlalchemy_defaults.drift import (
+    CATALOG_READERS,
+    check_drift,
+    check_enums,
+    Drift,
+    normalize_sql,
+    reflect
+)
+
+
+def make_metadata(configure=True):
+    metadata = sa.MetaData()
+    sa.Table(
+        'user',
+        metadata,
+        Column('id', sa.Integer, primary_key=True),
+        Column('is_active', sa.Boolean),
+        Column('created_at', sa.DateTime, auto_now='server'),
+    )
+    sa.Table(
+        'article',
+        metadata,
+        Column('id', sa.Integer, primary_key=True),
+        Column('author_id', sa.Integer, sa.ForeignKey('user.id')),
+        Column('kind', sa.Unicode(50), default=u'news'),
+        Column('rating', sa.Integer, min=1, max=5),
+    )
+    if configure:
+        configure_metadata(metadata)
+    return metadata
+
+
+@pytest.fixture
+def engine(tmpdir):
+    engine = sa.create_engine('sqlite:///%s' % tmpdir.join('drift.db'))
+    yield engine
+    engine.dispose()
+
+
+@pytest.fixture
+def metadata():
+    return make_metadata()
+
+
+def problems(drifts):
+    return sorted(
+        (drift.table, drift.kind, drift.problem) for drift in drifts
+    )
+
+
+class TestCheckDrift(object):
+    def test_no_drift(self, metadata, engine):
+        metadata.create_all(engine)
+        assert check_drift(metadata, engine) == []
+
+    def test_missing_generated_objects(self, metadata, engine):
+        make_metadata(configure=False).create_all(engine)
+        assert problems(check_drift(metadata, engine)) == [
+            ('article', 'check', 'missing'),
+            ('article', 'check', 'missing'),
+            ('article', 'index', 'missing'),
+            ('article', 'server_default', 'missing'),
+            ('user', 'server_default', 'missing'),
+            ('user', 'server_default', 'missing'),
+        ]
+
+    def test_extra_objects(self, metadata, engine):
+        metadata.create_all(engine)
+        with engine.begin() as connection:
+            connection.exec_driver_sql(
+                'CREATE INDEX ix_article_kind ON article (kind)'
+            )
+        unconfigured = make_metadata(configure=False)
+        drifts = check_drift(unconfigured, engine)
+        assert (
+            Drift(
+                'article',
+                'index',
+                'ix_article_kind',
+                'extra',
+                None,
+                ('kind', )
+            ) in drifts
+        )
+        assert ('article', 'check', 'extra') in problems(drifts)
+
+    def test_changed_server_default(self, metadata, engine):
+        metadata.create_all(engine)
+        metadata.tables['article'].c.kind.server_default = (
+            sa.DefaultClause(u'blog')
+        )
+        drifts = check_drift(metadata, engine)
+        assert len(drifts) == 1
+        assert str(drifts[0]) == (
+            "article server_default kind: changed "
+            "(expected \"'blog'\", got \"'news'\")"
+        )
+
+    def test_missing_table(self, metadata, engine):
+        metadata.tables['user'].create(engine)
+        assert problems(check_drift(metadata, engine)) == [
+            ('article', 'table', 'missing')
+        ]
+
+
+def add_tables(metadata, count):
+    for number in range(count):
+        sa.Table(
+            'extra_%d' % number,
+            metadata,
+            Column('id', sa.Integer, primary_key=True),
+            Column('user_id', sa.Integer, sa.ForeignKey('user.id')),
+            Column('score', sa.Integer, min=0),
+        )
+    configure_metadata(metadata)
+
+
+class TestReflect(object):
+    def count_queries(self, metadata, engine):
+        statements = []
+
+        def before_cursor_execute(conn, cursor, statement, *args):
+            statements.append(statement)
+
+        sa.event.listen(engine, 'before_cursor_execute', before_cursor_execute)
+        try:
+            assert check_drift(metadata, engine) == []
+        finally:
+            sa.event.remove(
+                engine, 'before_cursor_execute', before_cursor_execute
+            )
+        return len(statements)
+
+    @pytest.mark.skipif(
+        hasattr(sa.engine.reflection.Inspector, 'get_multi_columns'),
+        reason='inspector reflects whole schemas itself'
+    )
+    def test_queries_per_schema(self, engine):
+        small = make_metadata()
+        small.create_all(engine)
+        large = make_metadata(configure=False)
+        add_tables(large, 5)
+        large.create_all(engine)
+        assert self.count_queries(small, engine) == (
+            self.count_queries(large, engine)
+        )
+
+    @pytest.mark.parametrize('kind', [
+        'columns',
+        'check_constraints',
+        'indexes',
+    ])
+    def test_catalog_matches_inspector(self, engine, kind):
+        metadata = make_metadata(configure=False)
+        add_tables(metadata, 2)
+        metadata.create_all(engine)
+        with engine.connect() as connection:
+            inspector = sa.inspect(connection)
+            reflected = CATALOG_READERS['sqlite'][kind](connection, None)
+            for name in metadata.tables:
+                get = getattr(inspector, 'get_' + kind)
+                keys = ('name', 'default', 'sqltext', 'column_names')
+                assert [
+                    dict((key, item[key]) for key in keys if key in item)
+                    for item in get(name)
+                ] == [
+                    dict((key, item[key]) for key in keys if key in item)
+                    for item in reflected.get(name, [])
+                ]
+
+    def test_uses_get_multi(self, engine):
+        metadata = make_metadata()
+        metadata.create_all(engine)
+        calls = []
+
+        class MultiInspector(object):
+            def __init__(self, inspector):
+                self.inspector = inspector
+
+            def get_multi_columns(self, schema, filter_names):
+                calls.append(filter_names)
+                return dict(
+                    ((schema, name), self.inspector.get_columns(name))
+                    for name in filter_names
+                )
+
+        with engine.connect() as connection:
+            inspector = MultiInspector(sa.inspect(connection))
+            columns = reflect(
+                inspector, 'columns', None, ['user', 'article']
+            )
+        assert calls == [['user', 'article']]
+        assert sorted(columns) == ['article', 'user']
+        assert [column['name'] for column in columns['user']] == [
+            'id', 'is_active', 'created_at'
+        ]
+
+
+class StatusType(sa.types.TypeDecorator):
+    impl = sa.Enum(u'draft', u'published', name='status_enum')
+    cache_ok = True
+
+
+class TestCheckEnums(object):
+    @pytest.fixture
+    def table(self):
+        return sa.Table(
+            'article',
+            sa.MetaData(),
+            Column('id', sa.Integer, primary_key=True),
+            Column('status', StatusType()),
+        )
+
+    def test_type_decorator_enums(self, table):
+        assert list(check_enums([table], [], None)) == [
+            Drift(
+                None,
+                'enum',
+                'status_enum',
+                'missing',
+                [u'draft', u'published'],
+                None
+            )
+        ]
+
+    def test_changed_and_extra_enums(self, table):
+        enums = [
+            {'name': 'status_enum', 'labels': [u'draft']},
+            {'name': 'color_enum', 'labels': [u'red']},
+        ]
+        assert problems(check_enums([table], enums, 'public')) == [
+            ('public', 'enum', 'changed'),
+            ('public', 'enum', 'extra'),
+        ]
+
+
+class TestNormalizeSql(object):
+    @pytest.mark.parametrize(('sql', 'expected'), [
+        ('(rating >= 1)', 'rating>=1'),
+        ('"rating" <= 5', 'rating<=5'),
+        ("'news'::character varying", "'news'"),
+        ('(a) AND (b)', '(a)and(b)'),
+        (None, None),
+    ])
+    def test_normalize(self, sql, expected):
+        assert normalize_sql(sql) == expected
@@ -0,0 +1,106 @@
+# -*- coding: utf-8 -*-
+import pytest
+import sqlalchemy as sa
+
+from sqlalchemy_defaults import Column, configure_metadata
+
+
+@pytest.fixture
+def metadata():
+    return sa.MetaData()
+
+
+def create_table(metadata, name, *columns):
+    return sa.Table(
+        name,
+        metadata,
+        Column('id', sa.Integer, primary_key=True),
+        *columns
+    )
+
+
+class TestEnumNames(object):
+    def test_names_unnamed_enums(self, metadata):
+        table = create_table(
+            metadata,
+            'article',
+            Column('status', sa.Enum('draft', 'published'), default='draft')
+        )
+        configure_metadata(metadata)
+        assert table.c.status.type.name == 'status_enum'
+        assert table.c.status.server_default.arg == 'draft'
+
+    def test_shares_names_of_identical_enums(self, metadata):
+        article = create_table(
+            metadata, 'article', Column('state', sa.Enum('draft', 'done'))
+        )
+        page = create_table(
+            metadata, 'page', Column('status', sa.Enum('draft', 'done'))
+        )
+        configure_metadata(metadata)
+        assert article.c.state.type.name == 'state_enum'
+        assert page.c.status.type.name == 'state_enum'
+
+    def test_differently_ordered_enums_get_own_names(self, metadata):
+        article = create_table(
+            metadata, 'article', Column('priority', sa.Enum('low', 'high'))
+        )
+        page = create_table(
+            metadata, 'page', Column('priority', sa.Enum('high', 'low'))
+        )
+        configure_metadata(metadata)
+        assert article.c.priority.type.name == 'priority_enum'
+        assert page.c.priority.type.name == 'page_priority_enum'
+
+    def test_different_enums_on_same_named_columns(self, metadata):
+        article = create_table(
+            metadata, 'article', Column('status', sa.Enum('draft', 'done'))
+        )
+        user = create_table(
+            metadata, 'user', Column('status', sa.Enum('active', 'banned'))
+        )
+        configure_metadata(metadata)
+        names = set([article.c.status.type.name, user.c.status.type.name])
+        assert len(names) == 2
+        assert 'status_enum' in names
+
+    def test_reuses_explicit_names(self, metadata):
+        article = create_table(
+            metadata,
+            'article',
+            Column('status', sa.Enum('draft', 'done'))
+        )
+        create_table(
+            metadata,
+            'page',
+            Column('status', sa.Enum('draft', 'done', name='publish_state'))
+        )
+        configure_metadata(metadata)
+        assert article.c.status.type.name == 'publish_state'
+
+    def test_creates_shared_types_once(self, metadata):
+        for name in ('article', 'page', 'post'):
+            create_table(
+                metadata, name, Column('status', sa.Enum('draft', 'done'))
+            )
+        configure_metadata(metadata)
+        statements = []
+        engine = sa.create_mock_engine(
+            'postgresql://',
+            lambda sql, *args, **kwargs: statements.append(
+                str(sql.compile(dialect=engine.dialect))
+            )
+        )
+        metadata.create_all(engine, checkfirst=False)
+        assert len([
+            statement for statement in statements
+            if statement.startswith('CREATE TYPE')
+        ]) == 1
+
+    def test_enum_names_option(self, metadata):
+        table = create_table(
+            metadata, 'article', Column('status', sa.Enum('draft', 'done'))
+        )
+        table.info['lazy_options'] = {'enum_names': False}
+        configure_metadata(metadata)
+        assert table.c.status.type.name is None
@@ -0,0 +1,206 @@
+# -*- coding: utf-8 -*-
+import pytest
+import sqlalchemy as sa
+
+from sqlalchemy_defaults import Column, configure_metadata
+
+
+def index_columns(table):
+    return sorted(
+        tuple(column.name for column in index.columns)
+        for index in table.indexes
+    )
+
+
+@pytest.fixture
+def metadata():
+    metadata = sa.MetaData()
+    sa.Table(
+        'user',
+        metadata,
+        Column('id', sa.Integer, primary_key=True),
+    )
+    sa.Table(
+        'group',
+        metadata,
+        Column('id', sa.Integer, primary_key=True),
+        Column('version', sa.Integer, primary_key=True),
+    )
+    return metadata
+
+
+class TestForeignKeyIndexes(object):
+    def test_indexes_foreign_keys(self, metadata, connection):
+        article = sa.Table(
+            'article',
+            metadata,
+            Column('id', sa.Integer, primary_key=True),
+            Column('author_id', sa.Integer, sa.ForeignKey('user.id')),
+        )
+        configure_metadata(metadata)
+        assert article.c.author_id.index is True
+        assert index_columns(article) == [('author_id', )]
+        metadata.create_all(connection)
+        try:
+            indexes = sa.inspect(connection).get_indexes('article')
+            assert [index['column_names'] for index in indexes] == [
+                ['author_id']
+            ]
+        finally:
+            metadata.drop_all(connection)
+
+    def test_skips_columns_leading_primary_key(self, metadata):
+        membership = sa.Table(
+            'membership',
+            metadata,
+            Column(
+                'user_id',
+                sa.Integer,
+                sa.ForeignKey('user.id'),
+                primary_key=True
+            ),
+            Column(
+                'other_user_id',
+                sa.Integer,
+                sa.ForeignKey('user.id'),
+                primary_key=True
+            ),
+        )
+        configure_metadata(metadata)
+        assert index_columns(membership) == [('other_user_id', )]
+
+    def test_skips_columns_leading_existing_index(self, metadata):
+        article = sa.Table(
+            'article',
+            metadata,
+            Column('id', sa.Integer, primary_key=True),
+            Column('author_id', sa.Integer, sa.ForeignKey('user.id')),
+            Column('created_at', sa.DateTime),
+            sa.Index('ix_article_author_created', 'author_id', 'created_at')
+        )
+        configure_metadata(metadata)
+        assert index_columns(article) == [('author_id', 'created_at')]
+
+    def test_skips_unique_columns(self, metadata):
+        profile = sa.Table(
+            'profile',
+            metadata,
+            Column('id', sa.Integer, primary_key=True),
+            Column(
+                'user_id',
+                sa.Integer,
+                sa.ForeignKey('user.id'),
+                unique=True
+            ),
+        )
+        configure_metadata(metadata)
+        assert index_columns(profile) == []
+
+    def test_composite_foreign_keys(self, metadata):
+        document = sa.Table(
+            'document',
+            metadata,
+            Column('id', sa.Integer, primary_key=True),
+            Column('group_id', sa.Integer),
+            Column('group_version', sa.Integer),
+            sa.ForeignKeyConstraint(
+                ['group_id', 'group_version'],
+                ['group.id', 'group.version']
+            )
+        )
+        configure_metadata(metadata)
+        assert index_columns(document) == [('group_id', 'group_version')]
+        index = list(document.indexes)[0]
+        assert index.name == 'ix_document_group_id_group_version'
+
+    def test_column_options(self, metadata):
+        article = sa.Table(
+            'article',
+            metadata,
+            Column('id', sa.Integer, primary_key=True),
+            Column(
+                'author_id',
+                sa.Integer,
+                sa.ForeignKey('user.id'),
+                info={'lazy_options': {'index_foreign_keys': False}}
+            ),
+        )
+        configure_metadata(metadata)
+        assert index_columns(article) == []
+
+    def test_table_copies_do_not_duplicate_indexes(self, metadata):
+        article = sa.Table(
+            'article',
+            metadata,
+            Column('id', sa.Integer, primary_key=True),
+            Column('author_id', sa.Integer, sa.ForeignKey('user.id')),
+        )
+        configure_metadata(metadata)
+        copy = article.to_metadata(sa.MetaData())
+        assert index_columns(copy) == [('author_id', )]
+
+
+class TestPartialForeignKeyIndexes(object):
+    @pytest.fixture
+    def article(self, metadata):
+        return sa.Table(
+            'article',
+            metadata,
+            Column('id', sa.Integer, primary_key=True),
+            Column('author_id', sa.Integer, sa.ForeignKey('user.id')),
+            Column(
+                'editor_id',
+                sa.Integer,
+                sa.ForeignKey('user.id'),
+                nullable=False
+            ),
+            info={'lazy_options': {'partial_foreign_key_indexes': True}}
+        )
+
+    def test_partial_index_for_nullable_columns(self, article):
+        configure_metadata(article.metadata)
+        indexes = dict(
+            (list(index.columns)[0].name, index) for index in article.indexes
+        )
+        where = indexes['author_id'].dialect_options['sqlite']['where']
+        assert str(where) == 'article.author_id IS NOT NULL'
+        assert not article.c.author_id.index
+        assert indexes['editor_id'].dialect_options['sqlite']['where'] is None
+
+    def test_column_options(self, metadata):
+        article = sa.Table(
+            'article',
+            metadata,
+            Column('id', sa.Integer, primary_key=True),
+            Column(
+                'author_id',
+                sa.Integer,
+                sa.ForeignKey('user.id'),
+                info={
+                    'lazy_options': {'partial_foreign_key_indexes': True}
+                }
+            ),
+        )
+        configure_metadata(metadata)
+        index = list(article.indexes)[0]
+        assert index.dialect_options['sqlite']['where'] is not None
+
+    def test_create(self, article, connection):
+        configure_metadata(article.metadata)
+        article.metadata.create_all(connection)
+        try:
+            indexes = dict(
+                (index['column_names'][0], index['name'])
+                for index in sa.inspect(connection).get_indexes('article')
+            )
+            assert sorted(indexes) == ['author_id', 'editor_id']
+            if connection.engine.name == 'sqlite':
+                sql = connection.execute(
+                    sa.text(
+                        'SELECT sql FROM sqlite_master WHERE name = :name'
+                    ),
+                    {'name': indexes['author_id']}
+                ).scalar()
+                assert 'WHERE author_id IS NOT NULL' in sql
+        finally:
+            article.metadata.drop_all(connection)
@@ -0,0 +1,81 @@
+# -*- coding: utf-8 -*-
+import pytest
+import sqlalchemy as sa
+
+from sqlalchemy_defaults import (
+    Column,
+    ConfigurationManager,
+    ModelConfigurator,
+    Options
+)
+
+
+class TestOptions(object):
+    def test_merge(self):
+        options = Options({'auto_now': True, 'enum_names': True})
+        merged = options.merge({'auto_now': False})
+        assert merged['auto_now'] is False
+        assert merged['enum_names'] is True
+        assert options['auto_now'] is True
+
+    def test_merge_without_overrides_returns_same_options(self):
+        options = Options({'auto_now': True})
+        assert options.merge({}) is options
+        assert options.merge(None) is options
+
+    def test_unknown_options_raise(self):
+        options = Options({'auto_now': True})
+        with pytest.raises(ValueError) as excinfo:
+            options.merge({'auto_nwo': False})
+        assert 'auto_nwo' in str(excinfo.value)
+
+    def test_immutable(self):
+        options = Options({'auto_now': True})
+        with pytest.raises(AttributeError):
+            options.auto_now = False
+
+
+class TestOptionResolution(object):
+    @pytest.fixture
+    def User(self, Base):
+        Base.metadata.info['lazy_options'] = {'numeric_defaults': False}
+
+        class User(Base):
+            __tablename__ = 'user'
+            __lazy_options__ = {'string_defaults': False}
+
+            id = Column(sa.Integer, primary_key=True)
+            age = Column(sa.Integer, default=16)
+            name = Column(sa.Unicode(255), default=u'John')
+            nickname = Column(
+                sa.Unicode(255),
+                default=u'Johnny',
+                info={'lazy_options': {'string_defaults': True}}
+            )
+        return User
+
+    def test_metadata_options(self, User):
+        ModelConfigurator(ConfigurationManager(), User)()
+        assert User.__table__.c.age.server_default is None
+
+    def test_model_options(self, User):
+        ModelConfigurator(ConfigurationManager(), User)()
+        assert User.__table__.c.name.server_default is None
+
+    def test_column_options(self, User):
+        configurator = ModelConfigurator(ConfigurationManager(), User)
+        configurator()
+        nickname = User.__table__.c.nickname
+        assert nickname.server_default.arg == u'Johnny'
+        assert configurator.get_option('string_defaults') is False
+        assert configurator.get_option('string_defaults', nickname) is True
+
+    def test_unknown_model_options_raise_up_front(self, Base):
+        class User(Base):
+            __tablename__ = 'user'
+            __lazy_options__ = {'string_default': False}
+
+            id = Column(sa.Integer, primary_key=True)
+
+        with pytest.raises(ValueError):
+            ModelConfigurator(ConfigurationManager(), User)
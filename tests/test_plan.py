@@ -0,0 +1,116 @@
+# -*- coding: utf-8 -*-
+from decimal import Decimal
+
+import pytest
+import sqlalchemy as sa
+from sqlalchemy.schema import CreateIndex, CreateTable
+
+from sqlalchemy_defaults import Column, is_configured
+from sqlalchemy_defaults.plan import (
+    dump_plan,
+    export_plan,
+    load_plan,
+    PLAN_VERSION,
+    replay_plan
+)
+
+
+def make_metadata(kind_length=50):
+    metadata = sa.MetaData()
+    sa.Table(
+        'user',
+        metadata,
+        Column('id', sa.Integer, primary_key=True),
+        Column('is_active', sa.Boolean),
+        Column('created_at', sa.DateTime, auto_now=True),
+    )
+    sa.Table(
+        'article',
+        metadata,
+        Column('id', sa.Integer, primary_key=True),
+        Column('author_id', sa.Integer, sa.ForeignKey('user.id')),
+        Column('kind', sa.Unicode(kind_length), default=u'news'),
+        Column('rating', sa.Integer, min=1, max=5),
+        Column('status', sa.Enum('draft', 'published')),
+        Column('score', sa.Numeric(4, 2), min=Decimal('0.5')),
+    )
+    return metadata
+
+
+def render_ddl(metadata):
+    dialect = sa.create_engine('sqlite://').dialect
+    ddl = []
+    for table in metadata.sorted_tables:
+        ddl.append(str(CreateTable(table).compile(dialect=dialect)))
+        ddl.extend(sorted(
+            str(CreateIndex(index).compile(dialect=dialect))
+            for index in table.indexes
+        ))
+    return ddl
+
+
+@pytest.fixture
+def plan():
+    metadata = make_metadata()
+    plan = export_plan(metadata)
+    plan['ddl'] = render_ddl(metadata)
+    return plan
+
+
+class TestExportPlan(object):
+    def test_records_operations(self, plan):
+        assert plan['version'] == PLAN_VERSION
+        operations = plan['tables']['article']['operations']
+        assert ['string_defaults', 'server_default', ['kind', 'news']] in (
+            operations
+        )
+
+    def test_configures_tables(self):
+        metadata = make_metadata()
+        export_plan(metadata)
+        assert is_configured(metadata.tables['article'])
+
+    def test_raises_for_configured_tables(self):
+        metadata = make_metadata()
+        export_plan(metadata)
+        with pytest.raises(ValueError):
+            export_plan(metadata)
+
+
+class TestReplayPlan(object):
+    def test_replay_produces_same_ddl(self, plan):
+        metadata = make_metadata()
+        assert replay_plan(metadata, plan) == []
+        assert render_ddl(metadata) == plan['ddl']
+        assert metadata.tables['user'].c.is_active.default.arg is False
+
+    @pytest.mark.parametrize('extension', ['json', 'pickle'])
+    def test_dump_and_load(self, plan, tmpdir, extension):
+        path = str(tmpdir.join('plan.' + extension))
+        dump_plan(plan, path)
+        metadata = make_metadata()
+        assert replay_plan(metadata, load_plan(path)) == []
+        assert render_ddl(metadata) == plan['ddl']
+
+    def test_changed_table_falls_back(self, plan):
+        metadata = make_metadata(kind_length=100)
+        fallback = replay_plan(metadata, plan)
+        assert fallback == [metadata.tables['article']]
+        article = metadata.tables['article']
+        assert article.c.kind.server_default.arg == u'news'
+        assert is_configured(article)
+
+    def test_version_mismatch_falls_back(self, plan):
+        plan['version'] = PLAN_VERSION + 1
+        metadata = make_metadata()
+        assert len(replay_plan(metadata, plan)) == 2
+        assert render_ddl(metadata) == plan['ddl']
+
+    def test_decimal_checks(self, plan):
+        assert any('CHECK (score >= 0.5)' in sql for sql in plan['ddl'])
+
+    def test_failed_dump_leaves_no_file(self, tmpdir):
+        path = tmpdir.join('plan.json')
+        with pytest.raises(TypeError):
+            dump_plan({'tables': object()}, str(path))
+        assert tmpdir.listdir() == []
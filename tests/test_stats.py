@@ -0,0 +1,100 @@
+# -*- coding: utf-8 -*-
+import json
+import logging
+
+import pytest
+import sqlalchemy as sa
+
+from sqlalchemy_defaults import (
+    Column,
+    ConfigurationManager,
+    configure_metadata,
+    make_lazy_configured
+)
+from sqlalchemy_defaults.stats import ConfigurationStats
+
+
+@pytest.fixture
+def manager():
+    manager = ConfigurationManager()
+    manager.stats = ConfigurationStats()
+    return manager
+
+
+@pytest.fixture
+def metadata():
+    metadata = sa.MetaData()
+    sa.Table(
+        'user',
+        metadata,
+        Column('id', sa.Integer, primary_key=True),
+        Column('is_active', sa.Boolean),
+    )
+    sa.Table(
+        'article',
+        metadata,
+        Column('id', sa.Integer, primary_key=True),
+        Column('author_id', sa.Integer, sa.ForeignKey('user.id')),
+        Column('kind', sa.Unicode(50), default=u'news'),
+        Column('rating', sa.Integer, min=1, max=5),
+        Column('status', sa.Enum('draft', 'published')),
+    )
+    return metadata
+
+
+class TestConfigurationStats(object):
+    def test_measures_tables_and_columns(self, manager, metadata):
+        configure_metadata(metadata, manager)
+        stats = manager.stats
+        assert [table.table.name for table in stats.tables] == [
+            'user', 'article'
+        ]
+        article = stats.tables[1]
+        assert list(article.column_seconds) == [
+            'id', 'author_id', 'kind', 'rating', 'status'
+        ]
+        assert article.seconds >= sum(article.column_seconds.values())
+        assert stats.slowest(1) == [max(
+            stats.tables, key=lambda table: table.seconds
+        )]
+
+    def test_counts_by_option(self, manager, metadata):
+        configure_metadata(metadata, manager)
+        assert manager.stats.tables[1].counts == {
+            'string_defaults': {'server_defaults': 1},
+            'min_max_check_constraints': {'constraints': 2},
+            'enum_names': {'enum_names': 1},
+            'index_foreign_keys': {'indexes': 1},
+        }
+        assert manager.stats.counts()['boolean_defaults'] == {
+            'defaults': 1,
+            'server_defaults': 1
+        }
+
+    def test_report_is_json_serializable(self, manager, metadata):
+        configure_metadata(metadata, manager)
+        report = json.loads(json.dumps(manager.stats.report()))
+        assert report['tables'][0]['table'] == 'user'
+        assert report['tables'][0]['model'] is None
+
+    def test_listeners_and_logging(self, manager, metadata, caplog):
+        measured = []
+        manager.stats.listeners.append(measured.append)
+        with caplog.at_level(logging.DEBUG, 'sqlalchemy_defaults.stats'):
+            configure_metadata(metadata, manager)
+        assert measured == manager.stats.tables
+        assert 'Configured table article' in caplog.text
+
+    def test_lazy_configured_models(self, manager, Base):
+        class User(Base):
+            __tablename__ = 'user'
+            __lazy_options__ = {}
+
+            id = Column(sa.Integer, primary_key=True)
+
+        make_lazy_configured(sa.orm.Mapper, manager)
+        try:
+            sa.orm.configure_mappers()
+        finally:
+            sa.event.remove(sa.orm.Mapper, 'mapper_configured', manager)
+        assert manager.stats.tables[0].model is User
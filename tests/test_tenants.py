@@ -0,0 +1,138 @@
+# -*- coding: utf-8 -*-
+import pytest
+import sqlalchemy as sa
+from sqlalchemy.schema import CreateIndex, CreateTable
+
+from sqlalchemy_defaults import (
+    Column,
+    configure_metadata,
+    get_plan,
+    is_configured,
+    is_generated
+)
+from sqlalchemy_defaults.ddl import generated_constraints, generated_indexes
+from sqlalchemy_defaults.tenants import copy_table, tenant_metadata
+
+
+@pytest.fixture
+def metadata():
+    metadata = sa.MetaData()
+    sa.Table(
+        'user',
+        metadata,
+        Column('id', sa.Integer, primary_key=True),
+        Column('is_active', sa.Boolean),
+        Column('name', sa.Unicode(50), index=True),
+    )
+    sa.Table(
+        'article',
+        metadata,
+        Column('id', sa.Integer, primary_key=True),
+        Column('author_id', sa.Integer, sa.ForeignKey('user.id')),
+        Column('kind', sa.Unicode(50), default=u'news'),
+        Column('rating', sa.Integer, min=1, max=5),
+        Column('status', sa.Enum('draft', 'published')),
+    )
+    configure_metadata(metadata)
+    return metadata
+
+
+@pytest.fixture
+def article(metadata):
+    return metadata.tables['article']
+
+
+def render_ddl(table, schema=None):
+    # Table.to_metadata copies constraints in set order, so the lines of
+    # CREATE TABLE are compared in sorted order.
+    dialect = sa.create_engine('sqlite://').dialect
+    ddl = sorted(
+        line.strip(' \t,')
+        for line in str(CreateTable(table).compile(dialect=dialect)).split(
+            '\n'
+        )
+    )
+    ddl.extend(sorted(
+        str(CreateIndex(index).compile(dialect=dialect))
+        for index in table.indexes
+    ))
+    if schema is not None:
+        ddl = [
+            sql.replace(schema + '.', '').replace(schema + '_', '')
+            for sql in ddl
+        ]
+    return ddl
+
+
+class TestCopyTable(object):
+    def test_same_ddl(self, metadata, article):
+        target = sa.MetaData()
+        copy_table(metadata.tables['user'], target, schema='tenant_1')
+        copy = copy_table(article, target, schema='tenant_1')
+        assert copy.fullname == 'tenant_1.article'
+        assert render_ddl(copy, 'tenant_1') == render_ddl(article)
+
+    def test_generated_objects_are_tagged(self, article):
+        copy = copy_table(article, sa.MetaData(), schema='tenant_1')
+        assert is_configured(copy)
+        assert get_plan(copy) is get_plan(article)
+        assert len(generated_constraints(copy)) == 2
+        assert len(generated_indexes(copy)) == 1
+        assert len(copy.indexes) == 1
+
+    def test_keeps_source_intact(self, article):
+        copy_table(article, sa.MetaData(), schema='tenant_1')
+        assert len(generated_constraints(article)) == 2
+        assert len(generated_indexes(article)) == 1
+        assert article.c.author_id.index
+
+    def test_shares_defaults(self, article):
+        copy = copy_table(article, sa.MetaData(), schema='tenant_1')
+        assert copy.c.kind.server_default is article.c.kind.server_default
+        assert copy.c.status.type.name == 'status_enum'
+
+    def test_requires_configured_table(self):
+        table = sa.Table(
+            'other',
+            sa.MetaData(),
+            Column('id', sa.Integer, primary_key=True)
+        )
+        with pytest.raises(ValueError):
+            copy_table(table, sa.MetaData(), schema='tenant_1')
+
+
+class TestTenantMetadata(object):
+    def test_copies_all_tables(self, metadata):
+        tenant = tenant_metadata(metadata, 'tenant_1')
+        assert sorted(tenant.tables) == ['tenant_1.article', 'tenant_1.user']
+        article = tenant.tables['tenant_1.article']
+        assert list(article.c.author_id.foreign_keys)[0].column.table is (
+            tenant.tables['tenant_1.user']
+        )
+        for table in metadata.tables.values():
+            assert render_ddl(
+                tenant.tables['tenant_1.' + table.name], 'tenant_1'
+            ) == render_ddl(table)
+
+    def test_user_indexes_are_not_generated(self, metadata):
+        user = tenant_metadata(metadata, 'tenant_1').tables['tenant_1.user']
+        assert [is_generated(index) for index in user.indexes] == [False]
+
+    def test_partial_indexes_refer_to_copy(self):
+        metadata = sa.MetaData(
+            info={'lazy_options': {'partial_foreign_key_indexes': True}}
+        )
+        sa.Table('user', metadata, Column('id', sa.Integer, primary_key=True))
+        sa.Table(
+            'article',
+            metadata,
+            Column('id', sa.Integer, primary_key=True),
+            Column('author_id', sa.Integer, sa.ForeignKey('user.id')),
+        )
+        configure_metadata(metadata)
+        article = tenant_metadata(metadata, 'tenant_1').tables[
+            'tenant_1.article'
+        ]
+        index, = article.indexes
+        where = index.dialect_options['sqlite']['where']
+        assert where.left is article.c.author_id
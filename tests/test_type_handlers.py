@@ -0,0 +1,67 @@
+# -*- coding: utf-8 -*-
+import pytest
+import sqlalchemy as sa
+
+from sqlalchemy_defaults import Column, ConfigurationManager
+
+
+class UppercaseString(sa.types.TypeDecorator):
+    impl = sa.Unicode
+
+    def process_bind_param(self, value, dialect):
+        return value.upper() if value is not None else value
+
+
+class Flag(sa.types.TypeDecorator):
+    impl = sa.Boolean
+
+
+@pytest.fixture
+def User(Base, lazy_options):
+    class User(Base):
+        __tablename__ = 'user'
+        __lazy_options__ = lazy_options
+
+        id = Column(sa.Integer, primary_key=True)
+        code = Column(UppercaseString(20), default=u'abc')
+        is_flagged = Column(Flag, nullable=False)
+    return User
+
+
+@pytest.fixture
+def models(User):
+    return [User]
+
+
+class TestTypeHandlers(object):
+    def test_resolves_handlers_through_mro(self):
+        manager = ConfigurationManager()
+        assert manager.get_type_handlers(sa.Unicode(255)) == [
+            ('string_defaults', 'assign_string_defaults')
+        ]
+        assert manager.get_type_handlers(sa.BigInteger()) == [
+            ('numeric_defaults', 'assign_numeric_defaults')
+        ]
+        assert manager.get_type_handlers(sa.LargeBinary()) == []
+
+    def test_caches_handlers_per_type_class(self):
+        manager = ConfigurationManager()
+        handlers = manager.get_type_handlers(sa.Integer())
+        assert manager.get_type_handlers(sa.Integer()) is handlers
+        assert list(manager.type_handlers) == [sa.Integer]
+
+    def test_resolves_type_decorators_through_impl(self):
+        manager = ConfigurationManager()
+        assert (
+            manager.get_type_handlers(UppercaseString(20)) ==
+            manager.get_type_handlers(sa.Unicode(20))
+        )
+
+
+@pytest.mark.usefixtures('lazy_configured', 'Session')
+class TestTypeDecoratorDefaults(object):
+    def test_assigns_string_server_default(self, User):
+        assert User.__table__.c.code.server_default.arg == u'abc'
+
+    def test_assigns_boolean_defaults(self, User):
+        assert User.__table__.c.is_flagged.default.arg is False
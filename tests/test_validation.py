@@ -0,0 +1,101 @@
+# -*- coding: utf-8 -*-
+import pytest
+import sqlalchemy as sa
+
+from sqlalchemy_defaults import Column
+from sqlalchemy_defaults.validation import (
+    compile_validator,
+    make_validated,
+    ValidationError
+)
+
+
+def not_reserved(value):
+    if value == u'admin':
+        raise ValueError('%r is reserved' % value)
+
+
+class FormValidator(object):
+    def __call__(self, form, field):
+        raise AssertionError('Form validators should not be called.')
+
+
+@pytest.fixture
+def User(Base):
+    class User(Base):
+        __tablename__ = 'user'
+        __lazy_options__ = {}
+
+        id = Column(sa.Integer, primary_key=True)
+        name = Column(
+            sa.Unicode(255),
+            validators=[FormValidator()],
+            value_validators=[not_reserved]
+        )
+        status = Column(
+            sa.Unicode(20),
+            choices=[(u'active', u'Active'), (u'banned', u'Banned')],
+            default=u'active'
+        )
+        age = Column(sa.Integer, min=13, max=120, nullable=True)
+        double_age = sa.orm.column_property(age * 2)
+    return User
+
+
+@pytest.fixture
+def models(User):
+    return [User]
+
+
+class TestCompileValidator(object):
+    def test_checks_only_columns_with_arguments(self, User):
+        validator = compile_validator(sa.inspect(User))
+        assert validator.keys == frozenset(['name', 'status', 'age'])
+
+    def test_valid(self, User):
+        validator = compile_validator(sa.inspect(User))
+        user = User(name=u'John', status=u'active', age=20)
+        assert validator(user) == []
+
+    def test_invalid(self, User):
+        validator = compile_validator(sa.inspect(User))
+        user = User(name=u'admin', status=u'deleted', age=200)
+        assert sorted(key for key, _ in validator(user)) == [
+            'age', 'name', 'status'
+        ]
+
+    def test_keys(self, User):
+        validator = compile_validator(sa.inspect(User))
+        user = User(name=u'admin', status=u'deleted', age=10)
+        assert validator(user, ['age']) == [('age', '10 is less than 13')]
+
+
+@pytest.mark.usefixtures('lazy_configured')
+class TestBeforeFlushValidation(object):
+    @pytest.fixture
+    def session(self, Session):
+        make_validated(Session)
+        session = Session()
+        yield session
+        session.close()
+
+    def test_rejects_new_objects(self, User, session):
+        session.add(User(name=u'John', age=5))
+        with pytest.raises(ValidationError) as excinfo:
+            session.flush()
+        assert excinfo.value.errors[0][1:] == ('age', '5 is less than 13')
+
+    def test_rejects_changed_attributes(self, User, session):
+        user = User(name=u'John', age=20)
+        session.add(user)
+        session.flush()
+        user.status = u'deleted'
+        with pytest.raises(ValidationError):
+            session.flush()
+
+    def test_accepts_valid_objects(self, User, session):
+        user = User(name=u'John', age=20)
+        session.add(user)
+        session.flush()
+        user.age = 30
+        session.flush()